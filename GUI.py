@@ -1,14 +1,56 @@
+import json
+import os
+import sys
+import time
 import tkinter as tk
-from tkinter import ttk
+from tkinter import filedialog, ttk
+from background_worker import BackgroundWorker
+from blotter import Blotter
+from instrumentation import count, metrics, timed
+from money import format_minor
+from position_engine import GROSS_BUY, GROSS_SELL
+from trade_grid import TradeGrid
+from trade_import import read_trades
+from trade_journal import TradeJournal
+from trade_store import COLUMNS, COMMODITIES, SIDES, TRADE_TYPES
+
+# How often buffered journal writes are committed and positions snapshotted
+JOURNAL_FLUSH_MS = 250
+SNAPSHOT_INTERVAL_MS = 60000
+
+LOGO_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logo.png")
+# In lazy mode the panes are built once the input frame has been painted,
+# or after this long if it is never exposed (e.g. a withdrawn window)
+LAZY_BUILD_FALLBACK_MS = 200
 
 class SimpleGUI(tk.Tk):
-    def __init__(self):
+    def __init__(self, journal_path=None, lazy=False, on_interactive=None):
+        """Create the Trade Blotter window.
+
+        With lazy=True only the logo and the input frame are built here; the
+        trades and position panes and the journal load follow once the input
+        frame has been painted, and Save/Import are enabled when they are
+        done. on_interactive, if given, is called with startup_report() once
+        the window is painted and fully built.
+        """
+        self.startup_start = time.perf_counter()
+        self.startup_times = {}
+        self.on_interactive = on_interactive
         super().__init__()
         self.title("Trade Blotter")
         self.geometry("1000x800")
 
+        # All trade logic lives in the Tk-free blotter core; the widgets
+        # below only display what it holds
+        self.blotter = Blotter()
+        self.store = self.blotter.store
+        self.positions = self.blotter.positions
+
+        # Trade processing and I/O run here, off the Tk main loop
+        self.worker = BackgroundWorker(self)
+
         #logo
-        self.logo_image = tk.PhotoImage(file="logo.png")
+        self.logo_image = tk.PhotoImage(file=LOGO_PATH)
         logo_label = tk.Label(self, image=self.logo_image)
         logo_label.pack(anchor='w', padx=10, pady=10)
 
@@ -20,7 +62,7 @@ class SimpleGUI(tk.Tk):
         tk.Label(self.input_frame, text="Commodity:").grid(row=0, column=1, sticky='e', padx=100)
         self.commodity_var = tk.StringVar()
         self.commodity_dropdown = ttk.Combobox(self.input_frame, textvariable=self.commodity_var, state="readonly")
-        self.commodity_dropdown['values'] = ('Power', 'Natural Gas', 'ULSD')
+        self.commodity_dropdown['values'] = COMMODITIES
         self.commodity_dropdown.current(None)  # Set default to blank
         self.commodity_dropdown.grid(row=1, column=1, padx=5)
         # self.commodity_entry = tk.Entry(self.input_frame)
@@ -29,7 +71,7 @@ class SimpleGUI(tk.Tk):
         tk.Label(self.input_frame, text="Trade Type:").grid(row=0, column=2, sticky='e', padx=100)
         self.tt_var = tk.StringVar()
         self.tt_dropdown = ttk.Combobox(self.input_frame, textvariable=self.tt_var, state="readonly")
-        self.tt_dropdown['values'] = ('Physical', 'Financial')
+        self.tt_dropdown['values'] = TRADE_TYPES
         self.tt_dropdown.current(None)  # Set default to the first option
         self.tt_dropdown.grid(row=1, column=2, padx=5)
         # self.tt_entry = tk.Entry(self.input_frame)
@@ -38,7 +80,7 @@ class SimpleGUI(tk.Tk):
         tk.Label(self.input_frame, text="Buy_Sell:").grid(row=0, column=3, sticky='e', padx=100)
         self.buy_sell_var = tk.StringVar()
         self.buy_sell_dropdown = ttk.Combobox(self.input_frame, textvariable=self.buy_sell_var, state="readonly")
-        self.buy_sell_dropdown['values'] = ('Buy', 'Sell')
+        self.buy_sell_dropdown['values'] = SIDES
         self.buy_sell_dropdown.current(None)  # Set default to the first option
         self.buy_sell_dropdown.grid(row=1, column=3, padx=5)
         # self.buy_sell_entry = tk.Entry(self.input_frame)
@@ -52,79 +94,247 @@ class SimpleGUI(tk.Tk):
         self.save_button = tk.Button(self.input_frame, text="Save", command=self.save_details)
         self.save_button.grid(row=2, column=4, columnspan=2, pady=10)
 
+        # import button for bulk loading a trade file
+        self.import_button = tk.Button(self.input_frame, text="Import...", command=self.import_trades)
+        self.import_button.grid(row=2, column=3, pady=10)
+        self.input_frame.bind("<Expose>", self._on_first_paint)
+
+        self.journal_path = journal_path
+        self.journal = None
+        self.panes_built = False
+        self._build_id = None
+        if lazy:
+            # Show the input frame first, build the rest when it is on screen
+            self.save_button.config(state=tk.DISABLED)
+            self.import_button.config(state=tk.DISABLED)
+            self._build_id = self.after(LAZY_BUILD_FALLBACK_MS, self._build_panes)
+        else:
+            self._build_panes()
+
+    def _build_panes(self):
+        """Build the trades and position panes and load the journal.
+
+        In lazy mode anything that changes the book calls this first, so the
+        journaled trades come before new ones and there are panes to redraw.
+        Does nothing once the panes exist.
+        """
+        if self.panes_built:
+            return
+        self.panes_built = True
+        if self._build_id is not None:
+            self.after_cancel(self._build_id)
+
         # Trades Table display section
         self.trades_frame = tk.Frame(self)
         self.trades_frame.pack(pady=10, fill=tk.BOTH, expand=True)
         tk.Label(self.trades_frame, text="Trades", font=('Arial', 14, 'bold')).pack()
 
-        self.tree = ttk.Treeview(self.trades_frame, columns=("Commodity", "Trade Type", "Buy_Sell", "Value"), show="headings")
-        self.tree.heading("Commodity", text="Commodity")
-        self.tree.heading("Trade Type", text="Trade Type")
-        self.tree.heading("Buy_Sell", text="Buy_Sell")
-        self.tree.heading("Value", text="Value")
-        self.tree.pack(fill=tk.BOTH, expand=True)
+        # Only the visible trades are materialized as Treeview rows
+        self.trade_grid = TradeGrid(self.trades_frame, self.store, columns=COLUMNS)
+        self.trade_grid.pack(fill=tk.BOTH, expand=True)
+        self.tree = self.trade_grid.tree
 
         # Position Table
         self.position_frame = tk.Frame(self)
         self.position_frame.pack(pady=10, fill=tk.BOTH, expand=True)
         tk.Label(self.position_frame, text="Position", font=('Arial', 14, 'bold')).pack()
 
-        self.position_tree = ttk.Treeview(self.position_frame, columns=("Subtotal",), show="headings")
+        self.position_tree = ttk.Treeview(self.position_frame, columns=("Subtotal",), show="headings", height=1)
         self.position_tree.heading("Subtotal", text="Subtotal")
-        self.position_tree.pack(fill=tk.BOTH, expand=True)
+        self.position_tree.pack(fill=tk.X)
+        self.subtotal_row = self.position_tree.insert("", "end", values=("0.00",))
+
+        # Net position per (Commodity, Trade Type) plus gross buy and sell.
+        # Rows are created once and then updated in place.
+        self.breakdown_tree = ttk.Treeview(self.position_frame, columns=("Commodity", "Trade Type", "Position"), show="headings")
+        self.breakdown_tree.heading("Commodity", text="Commodity")
+        self.breakdown_tree.heading("Trade Type", text="Trade Type")
+        self.breakdown_tree.heading("Position", text="Position")
+        self.breakdown_tree.pack(fill=tk.BOTH, expand=True)
+        self.position_rows = {}
+        for commodity in COMMODITIES:
+            for tt in TRADE_TYPES:
+                self.position_rows[(commodity, tt)] = self.breakdown_tree.insert("", "end", values=(commodity, tt, "0.00"))
+        for key in (GROSS_BUY, GROSS_SELL):
+            self.position_rows[key] = self.breakdown_tree.insert("", "end", values=(key, "", "0.00"))
 
         # Subtotal label at the bottom
         self.subtotal_label = tk.Label(self, text="Subtotal: 0.00", font=('Arial', 12, 'bold'))
         self.subtotal_label.pack(pady=5)
 
-    def save_details(self):
-        commodity = self.commodity_var.get().strip()
-        tt = self.tt_var.get().strip()
-        buy_sell = self.buy_sell_var.get().strip()
-        value_str = self.value_entry.get().strip()
-
-        if commodity and tt and buy_sell and value_str:
-            try:
-                numeric_value = float(value_str)
-            except ValueError:
-                # If the entered value is not a valid number, ignore this entry
-                return
-
-            # If the trade is a Sell, make the value negative
-            if buy_sell.lower() == "sell":
-                numeric_value = -abs(numeric_value)
-            else:
-                numeric_value = abs(numeric_value)
-
-            # Insert new row into the table
-            self.tree.insert("", "end", values=(commodity, tt, buy_sell, numeric_value))
-            
-            # Reset input fields for next entry
-            self.commodity_dropdown.set("")
-            self.tt_dropdown.set("")
-            self.buy_sell_dropdown.set("")
-            self.value_entry.delete(0, tk.END)
-            
-            # Update the subtotal label
+        # Durable storage: reload the book saved by a previous session
+        if self.journal_path is not None:
+            self.journal = TradeJournal(self.journal_path)
+            self.journal.load(self.store, self.positions)
+            self.trade_grid.refresh()
             self.update_subtotal()
+            self.after(JOURNAL_FLUSH_MS, self._flush_journal)
+            self.after(SNAPSHOT_INTERVAL_MS, self._snapshot_positions)
+            self.protocol("WM_DELETE_WINDOW", self.close)
+
+        self.save_button.config(state=tk.NORMAL)
+        self.import_button.config(state=tk.NORMAL)
+        self._mark_startup("interactive_s")
+
+    def _on_first_paint(self, event):
+        self.input_frame.unbind("<Expose>")
+        self._mark_startup("first_paint_s")
+        if not self.panes_built:
+            # Replace the fallback timer, the frame is on screen now
+            self.after_cancel(self._build_id)
+            self._build_id = self.after_idle(self._build_panes)
+
+    def _mark_startup(self, name):
+        self.startup_times[name] = time.perf_counter() - self.startup_start
+        metrics.observe(f"gui.startup.{name[:-2]}", self.startup_times[name])
+        if len(self.startup_times) == 2 and self.on_interactive is not None:
+            self.on_interactive(self.startup_report())
+
+    def startup_report(self):
+        """Seconds from construction to the first paint and to a fully built window.
+
+        A phase that has not happened yet is reported as None.
+        """
+        return {name: self.startup_times.get(name) for name in ("first_paint_s", "interactive_s")}
+
+    @timed("gui.save_details")
+    def save_details(self):
+        self._build_panes()
+        # Validate and record the trade; Sells are made negative, Buys positive
+        changed = self.blotter.add_trade(self.commodity_var.get(), self.tt_var.get(), self.buy_sell_var.get(), self.value_entry.get())
+        if changed is None:
+            # Missing field or non-numeric value, ignore this entry
+            count("gui.trades_rejected")
+            return
+        count("gui.trades_saved")
+
+        # Journal the stored row, with its value in minor units, and display it
+        if self.journal is not None:
+            self.worker.submit(self.journal.append, self.store.raw_row(len(self.store) - 1))
+        self.trade_grid.row_added()
+
+        # Reset input fields for next entry
+        self.commodity_dropdown.set("")
+        self.tt_dropdown.set("")
+        self.buy_sell_dropdown.set("")
+        self.value_entry.delete(0, tk.END)
+
+        # Update the subtotal label
+        self.update_subtotal(changed)
+
+    def load_trades(self, trades, chunk_size=10000):
+        """Bulk load an iterable of (commodity, trade type, buy_sell, value) rows.
+
+        Rows go through the same validation and sign rule as save_details and
+        invalid rows are skipped. Trades are written to the store in chunks
+        and the grid and positions are redrawn once for the whole batch.
+        Returns the number of trades loaded.
+        """
+        self._build_panes()
+        loaded = self.blotter.load_trades(trades, chunk_size, on_chunk=self._journal_chunk)
+        count("gui.rows_loaded", loaded)
+        self.trade_grid.refresh()
+        self.update_subtotal()
+        return loaded
+
+    def _journal_chunk(self, chunk):
+        if self.journal is not None:
+            self.worker.submit(self.journal.extend, chunk)
+
+    def import_trades(self, path=None):
+        """Load a CSV or Parquet trade file, asking for one if no path is given.
+
+        The file is read and validated on the background worker and each
+        finished chunk is added to the blotter from the Tk main loop, so the
+        window stays responsive while a large book loads.
+        """
+        if path is None:
+            path = filedialog.askopenfilename(filetypes=[("Trade files", "*.csv *.parquet"), ("All files", "*")])
+            if not path:
+                return None
+        return self.worker.submit(self._read_trade_file, path)
+
+    def _read_trade_file(self, path, chunk_size=10000):
+        # Runs on the worker thread, must not touch any widgets
+        for chunk in Blotter.validated_chunks(read_trades(path), chunk_size):
+            self.worker.post(self._apply_chunk, chunk)
+
+    def _apply_chunk(self, chunk):
+        self._build_panes()
+        self.blotter.add_trades(chunk)
+        count("gui.rows_loaded", len(chunk))
+        self._journal_chunk(chunk)
+        self.trade_grid.refresh()
+        self.update_subtotal()
+
+    @timed("gui.update_subtotal")
+    def update_subtotal(self, changed=None):
+        """Refresh the subtotal and the Position rows listed in changed.
+
+        The positions are maintained by the position engine, so there is no
+        need to walk the Treeview here. With no changed keys every Position
+        row is refreshed.
+        """
+        total = format_minor(self.positions.total)
+        self.subtotal_label.config(text=f"Subtotal: {total}")
+        self.position_tree.item(self.subtotal_row, values=(total,))
+
+        if changed is None:
+            changed = self.position_rows
+        for key in changed:
+            labels = key if isinstance(key, tuple) else (key, "")
+            self.breakdown_tree.item(self.position_rows[key], values=labels + (format_minor(self.positions.position(key)),))
+
+    def reset(self):
+        """Return the window to its initial, empty state without rebuilding it.
+
+        Clears the book, the trade grid, the Position rows and the inputs, and
+        drops any results of background jobs still in flight. The journal, if
+        any, is truncated too, so the next session starts from the same empty
+        book instead of replaying the trades cleared here.
+        """
+        self._build_panes()
+        self.worker.discard()
+        if self.journal is not None:
+            # Queued on the worker, so it runs before any later journal write
+            self.worker.submit(self.journal.clear)
+        self.blotter.clear()
+        self.trade_grid.first = 0
+        self.trade_grid.refresh()
+        self.commodity_dropdown.set("")
+        self.tt_dropdown.set("")
+        self.buy_sell_dropdown.set("")
+        self.value_entry.delete(0, tk.END)
+        self.update_subtotal()
+
+    def _flush_journal(self):
+        self.worker.submit(self.journal.flush)
+        self.after(JOURNAL_FLUSH_MS, self._flush_journal)
+
+    def _snapshot_positions(self):
+        # The positions are copied here, the write happens on the worker
+        self.worker.submit(self.journal.snapshot, self.positions.snapshot())
+        self.after(SNAPSHOT_INTERVAL_MS, self._snapshot_positions)
+
+    def close(self):
+        """Commit the journal and snapshot the positions, then close the window."""
+        if self.journal is not None:
+            self.worker.submit(self.journal.snapshot, self.positions.snapshot())
+            self.worker.submit(self.journal.close)
+            self.journal = None
+        self.destroy()
 
-    def update_subtotal(self):
-            total = 0.0
-            # Loop through all items in the treeview
-            for item in self.tree.get_children():
-                row = self.tree.item(item)['values']
-                try:
-                    total += float(row[3])
-                except (ValueError, IndexError):
-                    # In case the value is non-numeric or missing, skip it
-                    continue
-            self.subtotal_label.config(text=f"Subtotal: {total:.2f}")
-
-            # Update the Position table by clearing it and inserting the new subtotal
-            for item in self.position_tree.get_children():
-                self.position_tree.delete(item)
-            self.position_tree.insert("", "end", values=(f"{total:.2f}",))
+    def destroy(self):
+        # Let queued writes finish before the interpreter goes away
+        if not self.panes_built:
+            self.after_cancel(self._build_id)
+        self.worker.shutdown()
+        super().destroy()
 
 if __name__ == "__main__":
-    app = SimpleGUI()
+    # --startup-report prints the startup timings as JSON once the window is ready
+    report = None
+    if "--startup-report" in sys.argv:
+        report = lambda times: print(json.dumps(times))
+    app = SimpleGUI(journal_path="trades.db", lazy=True, on_interactive=report)
     app.mainloop()
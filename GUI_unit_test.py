@@ -1,18 +1,27 @@
+import os
+import tempfile
+import time
 import unittest
 import tkinter as tk
 from GUI import SimpleGUI  # Adjust this import as needed
 
 class TestSimpleGUI(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # Create one instance of the GUI for the whole class, without calling
+        # mainloop. Starting Tk and decoding the logo is the slow part.
+        cls.app = SimpleGUI()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.app.destroy()
+
     def setUp(self):
-        # Create an instance of the GUI without calling mainloop.
-        self.app = SimpleGUI()
+        # Every test starts from an empty blotter.
+        self.app.reset()
         # Force initialization.
         self.app.update()
 
-    def tearDown(self):
-        # Destroy the GUI instance after each test.
-        self.app.destroy()
-
     def test_save_details_buy(self):
         # Simulate a "Buy" trade that should be positive.
         self.app.commodity_dropdown.set("Power")
@@ -204,5 +213,171 @@ class TestSimpleGUI(unittest.TestCase):
         subtotal = self.app.position_tree.item(pos_items[0])['values'][0]
         self.assertEqual(subtotal, "170.00", "Subtotal should be 170.00 after three trades.")
         
+    def test_position_breakdown(self):
+        """Net positions are shown per commodity and trade type."""
+        for commodity, tt, side, value in (("Power", "Physical", "Buy", "100"),
+                                           ("Power", "Physical", "Sell", "40"),
+                                           ("ULSD", "Financial", "Sell", "25")):
+            self.app.commodity_dropdown.set(commodity)
+            self.app.tt_dropdown.set(tt)
+            self.app.buy_sell_dropdown.set(side)
+            self.app.value_entry.insert(0, value)
+            self.app.save_button.invoke()
+        self.app.update()
+
+        rows = {}
+        for item in self.app.breakdown_tree.get_children():
+            values = self.app.breakdown_tree.item(item)['values']
+            rows[(values[0], values[1])] = str(values[2])
+        self.assertEqual(len(rows), 8)
+        self.assertEqual(rows[("Power", "Physical")], "60.00")
+        self.assertEqual(rows[("ULSD", "Financial")], "-25.00")
+        self.assertEqual(rows[("Natural Gas", "Physical")], "0.00")
+        self.assertEqual(rows[("Gross Buy", "")], "100.00")
+        self.assertEqual(rows[("Gross Sell", "")], "-65.00")
+
+    def test_trade_grid_materializes_visible_rows_only(self):
+        """A large book only creates Tk items for the visible window."""
+        for i in range(500):
+            self.app.store.append("Power", "Physical", "Buy", i * 100)
+        self.app.trade_grid.refresh()
+        self.app.update()
+
+        grid = self.app.trade_grid
+        items = self.app.tree.get_children()
+        self.assertLessEqual(len(items), grid.visible + grid.buffer)
+        self.assertEqual(float(self.app.tree.item(items[0])['values'][3]), 0.0)
+
+        # Scrolling pages the rows in from the store.
+        grid.yview("moveto", "0.5")
+        items = self.app.tree.get_children()
+        self.assertEqual(float(self.app.tree.item(items[0])['values'][3]), 250.0)
+        grid.yview("moveto", "1.0")
+        items = self.app.tree.get_children()
+        self.assertEqual(float(self.app.tree.item(items[grid.visible - 1])['values'][3]), 499.0)
+
+    def test_load_trades_bulk(self):
+        """Bulk loading applies the same sign rule and skips invalid rows."""
+        loaded = self.app.load_trades([
+            ("Power", "Physical", "Buy", "100"),
+            ("ULSD", "Financial", "Sell", 30),
+            ("Power", "Physical", "Buy", "not_a_number"),
+            ("", "Physical", "Buy", "10"),
+            ("Natural Gas", "Financial", "Buy", "-5"),
+        ], chunk_size=2)
+        self.app.update()
+
+        self.assertEqual(loaded, 3)
+        self.assertEqual(len(self.app.tree.get_children()), 3)
+        self.assertEqual(self.app.subtotal_label.cget("text"), "Subtotal: 75.00")
+        pos_items = self.app.position_tree.get_children()
+        self.assertEqual(self.app.position_tree.item(pos_items[0])['values'][0], "75.00")
+
+    def test_import_trades_in_background(self):
+        """A trade file is parsed off the main loop and applied via after()."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "book.csv")
+            with open(path, "w", newline="") as f:
+                f.write("Commodity,Trade Type,Buy_Sell,Value\nPower,Physical,Buy,100\nULSD,Financial,Sell,40\n")
+            self.app.import_trades(path).result(timeout=5)
+
+        deadline = time.monotonic() + 5
+        while len(self.app.store) < 2 and time.monotonic() < deadline:
+            self.app.update()
+        self.assertEqual(len(self.app.tree.get_children()), 2)
+        self.assertEqual(self.app.subtotal_label.cget("text"), "Subtotal: 60.00")
+
+    def test_reset_restores_initial_state(self):
+        """reset() clears trades, positions and inputs so the window can be reused."""
+        self.app.load_trades([("Power", "Physical", "Buy", i) for i in range(100)])
+        self.app.trade_grid.yview("moveto", "0.5")
+        self.app.commodity_dropdown.set("ULSD")
+        self.app.value_entry.insert(0, "12")
+        self.app.reset()
+        self.app.update()
+
+        self.assertEqual(len(self.app.store), 0)
+        self.assertEqual(self.app.tree.get_children(), ())
+        self.assertEqual(self.app.trade_grid.first, 0)
+        self.assertEqual(self.app.commodity_dropdown.get(), "")
+        self.assertEqual(self.app.value_entry.get(), "")
+        self.assertEqual(self.app.subtotal_label.cget("text"), "Subtotal: 0.00")
+        self.assertEqual(self.app.position_tree.item(self.app.subtotal_row)['values'][0], "0.00")
+        for item in self.app.breakdown_tree.get_children():
+            self.assertEqual(str(self.app.breakdown_tree.item(item)['values'][2]), "0.00")
+
+class TestJournal(unittest.TestCase):
+    def test_saved_trades_survive_restart(self):
+        """Trades entered with Save are journaled and reloaded by the next session."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "trades.db")
+            app = SimpleGUI(journal_path=path)
+            for commodity, tt, side, value in (("Power", "Physical", "Buy", "100.25"),
+                                               ("ULSD", "Financial", "Sell", "40")):
+                app.commodity_dropdown.set(commodity)
+                app.tt_dropdown.set(tt)
+                app.buy_sell_dropdown.set(side)
+                app.value_entry.insert(0, value)
+                app.save_button.invoke()
+            app.update()
+            app.close()
+
+            app = SimpleGUI(journal_path=path)
+            try:
+                app.update()
+                self.assertEqual([tuple(map(str, row)) for row in app.store.rows()],
+                                 [("Power", "Physical", "Buy", "100.25"), ("ULSD", "Financial", "Sell", "-40.00")])
+                self.assertEqual(app.subtotal_label.cget("text"), "Subtotal: 60.25")
+            finally:
+                app.close()
+
+
+    def test_reset_clears_the_journal(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "trades.db")
+            app = SimpleGUI(journal_path=path)
+            app.load_trades([("Power", "Physical", "Buy", "100")])
+            app.reset()
+            app.load_trades([("ULSD", "Financial", "Sell", "40")])
+            app.close()
+
+            app = SimpleGUI(journal_path=path)
+            try:
+                app.update()
+                self.assertEqual(len(app.store), 1)
+                self.assertEqual(app.subtotal_label.cget("text"), "Subtotal: -40.00")
+            finally:
+                app.close()
+
+
+class TestLazyStartup(unittest.TestCase):
+    def test_panes_built_after_first_paint(self):
+        """In lazy mode the input frame comes first and Save is enabled once the rest is built."""
+        reports = []
+        app = SimpleGUI(lazy=True, on_interactive=reports.append)
+        try:
+            self.assertFalse(app.panes_built)
+            self.assertEqual(str(app.save_button.cget("state")), "disabled")
+
+            deadline = time.monotonic() + 5
+            while not reports and time.monotonic() < deadline:
+                app.update()
+            self.assertTrue(app.panes_built)
+            self.assertEqual(str(app.save_button.cget("state")), "normal")
+            self.assertEqual(reports, [app.startup_report()])
+            self.assertLessEqual(reports[0]["first_paint_s"], reports[0]["interactive_s"])
+        finally:
+            app.destroy()
+
+    def test_load_trades_before_panes_are_built(self):
+        app = SimpleGUI(lazy=True)
+        try:
+            self.assertEqual(app.load_trades([("Power", "Physical", "Buy", "10")]), 1)
+            self.assertTrue(app.panes_built)
+            self.assertEqual(len(app.tree.get_children()), 1)
+            self.assertEqual(app.subtotal_label.cget("text"), "Subtotal: 10.00")
+        finally:
+            app.destroy()
+
 if __name__ == "__main__":
     unittest.main()
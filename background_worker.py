@@ -0,0 +1,76 @@
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Time the Tk main loop may spend applying results per poll, so a burst of
+# finished jobs never blocks rendering for longer than about one frame
+DRAIN_BUDGET_S = 0.008
+
+
+class BackgroundWorker:
+    """Runs trade processing and I/O jobs off the Tk main loop.
+
+    Jobs run in submission order on a single worker thread, so e.g. journal
+    writes stay ordered. When a job finishes its callback is queued and
+    later called on the Tk thread from an ``after()`` poll; Tk widgets are
+    only ever touched from there.
+    """
+
+    def __init__(self, root, poll_ms=10):
+        self.root = root
+        self.poll_ms = poll_ms
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="blotter-worker")
+        self.results = queue.SimpleQueue()
+        self._poll_id = self.root.after(self.poll_ms, self._drain)
+
+    def submit(self, fn, *args, callback=None):
+        """Run fn(*args) on the worker and call callback(result) on the Tk thread."""
+        future = self.executor.submit(fn, *args)
+        future.add_done_callback(lambda f: self._done(callback, f))
+        return future
+
+    def _done(self, callback, future):
+        error = future.exception()
+        self.results.put((callback, error, None if error is not None else future.result()))
+
+    def post(self, callback, result):
+        """From a worker job, hand an intermediate result to the Tk thread."""
+        self.results.put((callback, None, result))
+
+    def _drain(self):
+        deadline = time.perf_counter() + DRAIN_BUDGET_S
+        while time.perf_counter() < deadline:
+            try:
+                item = self.results.get_nowait()
+            except queue.Empty:
+                break
+            self._finish(*item)
+        self._poll_id = self.root.after(self.poll_ms, self._drain)
+
+    def _finish(self, callback, error, result):
+        if error is not None:
+            print(f"Background job failed: {error!r}")
+        elif callback is not None:
+            callback(result)
+
+    def discard(self):
+        """Wait for the jobs submitted so far and drop their queued results."""
+        # Jobs run in order, so once this no-op is done every earlier job
+        # has finished and queued its result
+        self.executor.submit(lambda: None).result()
+        while True:
+            try:
+                self.results.get_nowait()
+            except queue.Empty:
+                break
+
+    def shutdown(self):
+        """Wait for pending jobs, then apply any results still queued."""
+        self.root.after_cancel(self._poll_id)
+        self.executor.shutdown(wait=True)
+        while True:
+            try:
+                item = self.results.get_nowait()
+            except queue.Empty:
+                break
+            self._finish(*item)
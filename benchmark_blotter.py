@@ -0,0 +1,248 @@
+"""Benchmarks for the Trade Blotter hot paths.
+
+Measures window startup (time to first paint and to interactive), trade
+capture, subtotal refresh and trade grid insert/scroll cost at several
+book sizes and writes the results as JSON. The Blotter core is
+always measured; the SimpleGUI benchmarks need a display and are skipped
+without one, so in CI run this under Xvfb:
+
+    xvfb-run python benchmark_blotter.py --output benchmark-results.json \\
+        --baseline benchmark-baseline.json
+
+With --baseline the run fails if any median is more than --tolerance
+slower than the same benchmark in the baseline file. --summary appends a
+Markdown table of the results against the baseline to a file, e.g.
+$GITHUB_STEP_SUMMARY.
+"""
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+
+from blotter import Blotter
+from trade_store import COMMODITIES, SIDES, TRADE_TYPES
+
+DEFAULT_SIZES = (1000, 10000, 100000, 1000000)
+
+
+def make_trades(count, seed=0):
+    rng = random.Random(seed)
+    return [
+        (rng.choice(COMMODITIES), rng.choice(TRADE_TYPES), rng.choice(SIDES), f"{rng.uniform(1, 1000):.2f}")
+        for _ in range(count)
+    ]
+
+
+def measure(fn, repeat):
+    """Call fn repeat times and return the individual timings in seconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def summarize(name, size, timings):
+    timings = sorted(timings)
+    return {
+        "name": name,
+        "size": size,
+        "runs": len(timings),
+        "median_s": statistics.median(timings),
+        "p99_s": timings[min(len(timings) - 1, int(len(timings) * 0.99))],
+        "max_s": timings[-1],
+    }
+
+
+def bench_core(size, trades, repeat):
+    results = []
+    blotter = Blotter()
+
+    start = time.perf_counter()
+    blotter.load_trades(trades)
+    results.append(summarize("core.load_trades", size, [time.perf_counter() - start]))
+
+    new_trades = make_trades(repeat, seed=size)
+    it = iter(new_trades)
+    results.append(summarize("core.add_trade", size, measure(lambda: blotter.add_trade(*next(it)), repeat)))
+    results.append(summarize("core.total", size, measure(lambda: blotter.total, repeat)))
+    results.append(summarize("core.store_total", size, measure(blotter.store.total, min(repeat, 20))))
+    return results
+
+
+def bench_gui(size, trades, repeat):
+    import tkinter as tk
+    from GUI import SimpleGUI
+
+    try:
+        app = SimpleGUI()
+    except tk.TclError as e:
+        print(f"Skipping GUI benchmarks, no display: {e}")
+        return []
+
+    results = []
+    try:
+        app.update()
+        start = time.perf_counter()
+        app.load_trades(trades)
+        app.update()
+        results.append(summarize("gui.load_trades", size, [time.perf_counter() - start]))
+
+        new_trades = iter(make_trades(repeat, seed=size))
+
+        def save():
+            commodity, tt, side, value = next(new_trades)
+            app.commodity_dropdown.set(commodity)
+            app.tt_dropdown.set(tt)
+            app.buy_sell_dropdown.set(side)
+            app.value_entry.insert(0, value)
+            app.save_details()
+            app.update_idletasks()
+
+        results.append(summarize("gui.save_details", size, measure(save, repeat)))
+        results.append(summarize("gui.update_subtotal", size, measure(app.update_subtotal, repeat)))
+
+        grid = app.trade_grid
+        rng = random.Random(size)
+
+        def scroll():
+            grid.yview("moveto", str(rng.random()))
+            app.update_idletasks()
+
+        results.append(summarize("gui.grid_scroll", size, measure(scroll, repeat)))
+        # Follow the tail of the book, so every appended row is inserted into the visible window
+        grid.yview("moveto", "1.0")
+
+        def insert():
+            app.store.append("Power", "Physical", "Buy", 100)
+            grid.row_added()
+            app.update_idletasks()
+
+        results.append(summarize("gui.grid_insert", size, measure(insert, repeat)))
+    finally:
+        app.destroy()
+    return results
+
+
+def bench_startup(repeat):
+    """Time a lazy SimpleGUI from construction to first paint and to interactive."""
+    import tkinter as tk
+    from GUI import SimpleGUI
+
+    first_paint, interactive = [], []
+    for _ in range(repeat):
+        reports = []
+        try:
+            app = SimpleGUI(lazy=True, on_interactive=reports.append)
+        except tk.TclError as e:
+            print(f"Skipping startup benchmark, no display: {e}")
+            return []
+        try:
+            deadline = time.perf_counter() + 10
+            while not reports and time.perf_counter() < deadline:
+                app.update()
+        finally:
+            app.destroy()
+        if reports:
+            first_paint.append(reports[0]["first_paint_s"])
+            interactive.append(reports[0]["interactive_s"])
+    if not interactive:
+        return []
+    return [summarize("gui.first_paint", 0, first_paint), summarize("gui.interactive", 0, interactive)]
+
+
+def compare(results, baseline, tolerance):
+    """Return a message for every benchmark slower than its baseline by more than tolerance."""
+    previous = {(r["name"], r["size"]): r for r in baseline["results"]}
+    regressions = []
+    for result in results:
+        base = previous.get((result["name"], result["size"]))
+        if base is None or base["median_s"] <= 0:
+            continue
+        ratio = result["median_s"] / base["median_s"]
+        if ratio > 1 + tolerance:
+            regressions.append(
+                f"{result['name']} @ {result['size']}: {result['median_s']:.6f}s vs baseline {base['median_s']:.6f}s ({ratio:.2f}x)"
+            )
+    return regressions
+
+
+def summary_table(results, baseline, tolerance):
+    """Return a Markdown table of the results, compared to baseline if there is one."""
+    previous = {(r["name"], r["size"]): r for r in baseline["results"]} if baseline else {}
+    lines = ["| Benchmark | Size | Median (ms) | Baseline (ms) | Change |", "|---|---:|---:|---:|---|"]
+    for result in results:
+        base = previous.get((result["name"], result["size"]))
+        if base is None or base["median_s"] <= 0:
+            baseline_ms, change = "", "new"
+        else:
+            ratio = result["median_s"] / base["median_s"]
+            baseline_ms = f"{base['median_s'] * 1e3:.3f}"
+            change = f"{ratio:.2f}x" + (" :x: regression" if ratio > 1 + tolerance else "")
+        lines.append(f"| {result['name']} | {result['size']} | {result['median_s'] * 1e3:.3f} | {baseline_ms} | {change} |")
+    if not baseline:
+        lines.append("")
+        lines.append("No baseline to compare against.")
+    return "\n".join(lines) + "\n"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="comma-separated book sizes to benchmark")
+    parser.add_argument("--repeat", type=int, default=200, help="timed calls per benchmark")
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--baseline", help="JSON results of a previous run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown over the baseline median, e.g. 0.25 for 25%%")
+    parser.add_argument("--summary", help="append a Markdown comparison table to this file")
+    parser.add_argument("--no-gui", action="store_true", help="only benchmark the Tk-free core")
+    args = parser.parse_args(argv)
+
+    results = []
+    if not args.no_gui:
+        results += bench_startup(min(args.repeat, 10))
+        for result in results:
+            print(f"{result['name']:<22} {'':>8}  median {result['median_s'] * 1e3:9.3f} ms  p99 {result['p99_s'] * 1e3:9.3f} ms")
+    for size in (int(s) for s in args.sizes.split(",")):
+        trades = make_trades(size)
+        first = len(results)
+        results += bench_core(size, trades, args.repeat)
+        if not args.no_gui:
+            results += bench_gui(size, trades, args.repeat)
+        for result in results[first:]:
+            print(f"{result['name']:<22} {size:>8}  median {result['median_s'] * 1e3:9.3f} ms  p99 {result['p99_s'] * 1e3:9.3f} ms")
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Benchmark results written to {args.output}")
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    if args.summary:
+        with open(args.summary, "a") as f:
+            f.write("## Trade Blotter benchmarks\n\n" + summary_table(results, baseline, args.tolerance))
+
+    if baseline:
+        regressions = compare(results, baseline, args.tolerance)
+        for message in regressions:
+            print(f"Regression: {message}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,32 @@
+import unittest
+from benchmark_blotter import compare, summary_table
+
+
+def result(name, size, median_s):
+    return {"name": name, "size": size, "median_s": median_s}
+
+
+class TestCompare(unittest.TestCase):
+    def setUp(self):
+        self.baseline = {"results": [result("core.add_trade", 1000, 0.010), result("core.total", 1000, 0.002)]}
+
+    def test_regressions_beyond_tolerance(self):
+        results = [result("core.add_trade", 1000, 0.013), result("core.total", 1000, 0.0024)]
+        regressions = compare(results, self.baseline, tolerance=0.25)
+        self.assertEqual(len(regressions), 1)
+        self.assertTrue(regressions[0].startswith("core.add_trade @ 1000"))
+
+    def test_new_benchmarks_are_not_regressions(self):
+        results = [result("core.add_trade", 10000, 1.0), result("gui.first_paint", 0, 1.0)]
+        self.assertEqual(compare(results, self.baseline, tolerance=0.25), [])
+
+    def test_summary_table(self):
+        results = [result("core.add_trade", 1000, 0.013), result("gui.first_paint", 0, 0.1)]
+        table = summary_table(results, self.baseline, tolerance=0.25)
+        self.assertIn("| core.add_trade | 1000 | 13.000 | 10.000 | 1.30x :x: regression |", table)
+        self.assertIn("| gui.first_paint | 0 | 100.000 |  | new |", table)
+        self.assertIn("No baseline", summary_table(results, None, tolerance=0.25))
+
+
+if __name__ == "__main__":
+    unittest.main()
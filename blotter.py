@@ -0,0 +1,90 @@
+from money import from_minor
+from position_engine import PositionEngine
+from trade_store import TradeStore, normalize_trade
+
+
+class Blotter:
+    """Trade capture core of the Trade Blotter.
+
+    Validates trades, applies the Buy/Sell sign rule, records them in a
+    TradeStore and keeps the positions up to date. It never imports
+    tkinter, so it can be used server-side, in batch jobs and in tests;
+    SimpleGUI delegates all of its trade logic here.
+    """
+
+    def __init__(self):
+        self.store = TradeStore()
+        self.positions = PositionEngine()
+
+    def __len__(self):
+        return len(self.store)
+
+    @property
+    def total(self):
+        """The overall position as an exact Decimal."""
+        return from_minor(self.positions.total)
+
+    def add_trade(self, commodity, trade_type, buy_sell, value):
+        """Validate and record a single trade.
+
+        Returns the position keys that changed, or None if the trade is
+        invalid and was not recorded.
+        """
+        trade = normalize_trade(commodity, trade_type, buy_sell, value)
+        if trade is None:
+            return None
+        commodity, trade_type, buy_sell, numeric_value = trade
+        self.store.append(commodity, trade_type, buy_sell, numeric_value)
+        return self.positions.add(numeric_value, (commodity, trade_type))
+
+    def add_trades(self, trades):
+        """Record a batch of trades that were already validated by normalize_trade."""
+        self.store.extend(trades)
+        for commodity, trade_type, _, value in trades:
+            self.positions.add(value, (commodity, trade_type))
+        return len(trades)
+
+    def load_trades(self, trades, chunk_size=10000, on_chunk=None):
+        """Validate and record an iterable of (commodity, trade type, buy_sell, value) rows.
+
+        Invalid rows are skipped. Valid trades are recorded in chunks and
+        on_chunk, if given, is called with each recorded chunk. Returns the
+        number of trades recorded.
+        """
+        loaded = 0
+        for chunk in self.validated_chunks(trades, chunk_size):
+            loaded += self.add_trades(chunk)
+            if on_chunk is not None:
+                on_chunk(chunk)
+        return loaded
+
+    @staticmethod
+    def validated_chunks(trades, chunk_size=10000):
+        """Yield lists of up to chunk_size validated trades from raw rows."""
+        chunk = []
+        for row in trades:
+            trade = normalize_trade(*row)
+            if trade is None:
+                continue
+            chunk.append(trade)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def trades(self, start=0, stop=None):
+        """Return the recorded trades as (commodity, trade type, buy_sell, Decimal value) rows."""
+        return self.store.rows(start, stop)
+
+    def position(self, key):
+        """Return the net position of a (commodity, trade type) group, or the gross buy/sell."""
+        return from_minor(self.positions.position(key))
+
+    def net_positions(self):
+        """Return a dict of the net position per (commodity, trade type) group."""
+        return {group: from_minor(units) for group, units in self.positions.net.items()}
+
+    def clear(self):
+        self.store.clear()
+        self.positions.clear()
@@ -0,0 +1,68 @@
+import os
+import subprocess
+import sys
+import unittest
+from blotter import Blotter
+from position_engine import GROSS_BUY, GROSS_SELL
+
+class TestBlotter(unittest.TestCase):
+    def setUp(self):
+        # No Tk interpreter or display needed.
+        self.blotter = Blotter()
+
+    def test_add_trade_buy(self):
+        changed = self.blotter.add_trade("Power", "Physical", "Buy", "100")
+        self.assertEqual(changed, (("Power", "Physical"), GROSS_BUY))
+        self.assertEqual(self.blotter.trades(), [("Power", "Physical", "Buy", 100.0)])
+        self.assertEqual(self.blotter.total, 100.0)
+
+    def test_add_trade_sell(self):
+        self.blotter.add_trade("ULSD", "Financial", "Sell", "50")
+        self.assertEqual(self.blotter.trades(), [("ULSD", "Financial", "Sell", -50.0)])
+        self.assertEqual(self.blotter.total, -50.0)
+        self.assertEqual(self.blotter.position(GROSS_SELL), -50.0)
+
+    def test_invalid_trades_are_ignored(self):
+        self.assertIsNone(self.blotter.add_trade("", "Physical", "Buy", "100"))
+        self.assertIsNone(self.blotter.add_trade("ULSD", "Financial", "Buy", "not_a_number"))
+        self.assertEqual(len(self.blotter), 0)
+        self.assertEqual(self.blotter.total, 0.0)
+
+    def test_positions(self):
+        """Three trades give the same subtotal the GUI shows."""
+        self.blotter.add_trade("Natural Gas", "Physical", "Buy", "120")
+        self.blotter.add_trade("ULSD", "Financial", "Sell", "30")
+        self.blotter.add_trade("Power", "Physical", "Buy", "80")
+        self.assertEqual(self.blotter.total, 170.0)
+        self.assertEqual(self.blotter.net_positions(), {
+            ("Natural Gas", "Physical"): 120.0,
+            ("ULSD", "Financial"): -30.0,
+            ("Power", "Physical"): 80.0,
+        })
+
+    def test_load_trades_in_chunks(self):
+        chunks = []
+        loaded = self.blotter.load_trades(
+            [("Power", "Physical", "Buy", "100"), ("Power", "Physical", "Buy", "x"),
+             ("ULSD", "Financial", "Sell", 30), ("ULSD", "Physical", "Buy", 5)],
+            chunk_size=2, on_chunk=chunks.append)
+        self.assertEqual(loaded, 3)
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 1])
+        self.assertEqual(self.blotter.total, 75.0)
+
+    def test_sign_rule_cannot_overflow(self):
+        """The most negative int64 is rejected, so a Buy of it cannot flip out of range."""
+        self.assertIsNone(self.blotter.add_trade("Power", "Physical", "Buy", "-92233720368547758.08"))
+        loaded = self.blotter.load_trades([("Power", "Physical", "Buy", "10"),
+                                           ("ULSD", "Physical", "Buy", "-92233720368547758.08")])
+        self.assertEqual(loaded, 1)
+        store = self.blotter.store
+        self.assertEqual([len(col) for col in (store.commodity, store.trade_type, store.side, store.value)], [1, 1, 1, 1])
+
+    def test_import_does_not_load_tkinter(self):
+        code = "import sys, blotter; sys.exit('tkinter' in sys.modules)"
+        here = os.path.dirname(os.path.abspath(__file__))
+        self.assertEqual(subprocess.call([sys.executable, "-c", code], cwd=here), 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,6 +4,11 @@ import requests
 import json
 import sys
 import base64
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from defect_index import Checkpoint, DefectIndex, fingerprint
+from instrumentation import count, timed, timer
+from request_scheduler import RequestScheduler
 
 # Read required environment variables.
 qase_api_base_url = os.environ.get("QASE_API_BASE_URL")
@@ -15,35 +20,32 @@ jira_domain = os.environ.get("JIRA_DOMAIN")  # e.g., "optimus-us"
 jira_email = os.environ.get("JIRA_EMAIL")
 jira_api_token = os.environ.get("JIRA_API_TOKEN")
 jira_project_key = os.environ.get("JIRA_PROJECT_KEY")  # e.g., "QTR"
+# Override for the Jira site URL, e.g. to point at a local stub server.
+jira_base_url = os.environ.get("JIRA_BASE_URL") or f"https://{jira_domain}.atlassian.net"
 
-# Check required Qase configuration.
-if not all([qase_api_base_url, qase_api_token, qase_project_code]):
-    print("Missing Qase configuration in environment variables. Skipping defect creation.")
-    sys.exit(1)
-
-# Parse the test-results.xml file.
-try:
-    tree = ET.parse("test-results.xml")
-    root = tree.getroot()
-except Exception as e:
-    print(f"Error parsing test results XML: {e}")
-    sys.exit(1)
-
-# Extract failed tests from the XML.
-failed_tests = []
-for testsuite in root.findall("testsuite"):
-    for testcase in testsuite.findall("testcase"):
-        # Look for a <failure> element.
-        failure = testcase.find("failure")
-        if failure is not None:
-            test_name = testcase.get("name")
-            failure_message = failure.text or "No details provided."
-            failed_tests.append((test_name, failure_message))
-
-if not failed_tests:
-    print("No test failures found. No defects to create.")
-    sys.exit(0)
+# Number of failures processed in parallel.
+defect_concurrency = int(os.environ.get("DEFECT_CONCURRENCY", "8"))
+# Jira issues created per bulk request (Jira accepts up to 50), 1 disables bulk creation.
+jira_bulk_size = int(os.environ.get("JIRA_BULK_SIZE", "50"))
 
+# Local index of failures already filed, so repeat failures are skipped.
+defect_index_path = os.environ.get("DEFECT_INDEX_PATH", "defect-index.db")
+# Days a filed failure may go unseen before it is evicted from the index.
+defect_index_ttl_days = float(os.environ.get("DEFECT_INDEX_TTL_DAYS", "30"))
+# Also evict failures whose Jira issue is done (one search request per 100 issues).
+defect_index_check_resolved = os.environ.get("DEFECT_INDEX_CHECK_RESOLVED", "") == "1"
+
+# Progress of the current run, so a rerun only does the work that is left.
+defect_checkpoint_path = os.environ.get("DEFECT_CHECKPOINT_PATH", "defect-checkpoint.jsonl")
+
+# All tracker calls go through one scheduler: per-host rate limit, retries
+# with backoff on 429/5xx, and a pooled keep-alive session per worker thread.
+scheduler = RequestScheduler(
+    rate=float(os.environ.get("TRACKER_RATE_LIMIT", "10")),  # requests per second per host
+    max_retries=int(os.environ.get("TRACKER_MAX_RETRIES", "5")),
+)
+
+@timed("defects.create_qase_defect")
 def create_qase_defect(test_name, failure_message):
     """Create a defect in Qase and return its ID if successful."""
     payload = {
@@ -58,7 +60,7 @@ def create_qase_defect(test_name, failure_message):
         "Token": qase_api_token,
     }
     url = f"{qase_api_base_url}/defect"
-    response = requests.post(url, data=json.dumps(payload), headers=headers)
+    response = scheduler.post(url, data=json.dumps(payload), headers=headers)
     if response.status_code in (200, 201):
         print(f"Defect created for {test_name}.")
         # Assuming the response JSON contains the defect ID in result.id
@@ -73,19 +75,20 @@ def create_qase_defect(test_name, failure_message):
         print(f"Failed to create defect for {test_name}. Response: {response.status_code} {response.text}")
         return None
 
-def create_jira_issue(test_name, failure_message):
-    """Create a Jira issue for the failed test and return the Jira issue key if successful."""
+def get_jira_headers():
+    """Return the JSON and Basic Auth headers for the Jira API."""
     # Prepare the Basic Auth header using Python.
     auth_str = f"{jira_email}:{jira_api_token}"
     encoded_auth = base64.b64encode(auth_str.encode("utf-8")).decode("utf-8")
-    jira_headers = {
+    return {
         "Content-Type": "application/json",
         "Authorization": f"Basic {encoded_auth}"
     }
-    # Jira API endpoint to create an issue.
-    url = f"https://{jira_domain}.atlassian.net/rest/api/3/issue"
+
+def jira_issue_payload(test_name, failure_message):
+    """Return the Jira issue create payload for a failed test."""
     # Define the JSON payload using an f-string for interpolation.
-    jira_payload = {
+    return {
         "fields": {
             "project": {"key": jira_project_key},
             "summary": f"Test Failure: {test_name}",
@@ -107,7 +110,14 @@ def create_jira_issue(test_name, failure_message):
             "issuetype": {"name": "Bug"}
         }
     }
-    response = requests.post(url, data=json.dumps(jira_payload), headers=jira_headers)
+
+@timed("defects.create_jira_issue")
+def create_jira_issue(test_name, failure_message):
+    """Create a Jira issue for the failed test and return the Jira issue key if successful."""
+    # Jira API endpoint to create an issue.
+    url = f"{jira_base_url}/rest/api/3/issue"
+    jira_payload = jira_issue_payload(test_name, failure_message)
+    response = scheduler.post(url, data=json.dumps(jira_payload), headers=get_jira_headers())
     if response.status_code in (200, 201):
         try:
             jira_issue = response.json()
@@ -121,26 +131,305 @@ def create_jira_issue(test_name, failure_message):
         print(f"Failed to create Jira issue for {test_name}. Response: {response.status_code} {response.text}")
         return None
 
+@timed("defects.create_jira_issues_bulk")
+def create_jira_issues_bulk(failures):
+    """Create Jira issues for a batch of (test name, failure message) in one request.
+
+    Returns the issue keys in the order of failures. Items that Jira rejects,
+    or the whole batch if the bulk request fails, fall back to one
+    create_jira_issue call each; a fallback that fails only loses its own
+    key, never the issues the bulk request already created.
+    """
+    url = f"{jira_base_url}/rest/api/3/issue/bulk"
+    jira_payload = {"issueUpdates": [jira_issue_payload(*failure) for failure in failures]}
+    response = scheduler.post(url, data=json.dumps(jira_payload), headers=get_jira_headers())
+    keys = [None] * len(failures)
+    if response.status_code in (200, 201):
+        try:
+            result = response.json()
+            failed = {error.get("failedElementNumber") for error in result.get("errors", [])}
+            # Jira lists the created issues in request order, skipping rejected items.
+            created = iter(result.get("issues", []))
+            for i, (test_name, _) in enumerate(failures):
+                if i not in failed:
+                    issue = next(created, None)
+                    keys[i] = issue.get("key") if issue else None
+                    if keys[i]:
+                        print(f"Jira issue {keys[i]} created for {test_name}.")
+        except Exception as e:
+            print("Error parsing Jira bulk creation response:", e)
+    else:
+        print(f"Failed to bulk create {len(failures)} Jira issues. Response: {response.status_code} {response.text}")
+
+    for i, failure in enumerate(failures):
+        if keys[i] is None:
+            keys[i] = call_safely(create_jira_issue, *failure)
+    return keys
+
+@timed("defects.update_qase_defect_with_jira_link")
 def update_qase_defect_with_jira_link(defect_id, jira_issue_key):
     """Update a Qase defect with a link to the corresponding Jira issue."""
     payload = {
-        "jira_link": f"https://{jira_domain}.atlassian.net/browse/{jira_issue_key}"
+        "jira_link": f"{jira_base_url}/browse/{jira_issue_key}"
     }
     headers = {
         "Content-Type": "application/json",
         "Token": qase_api_token,
     }
     url = f"{qase_api_base_url}/defect/{defect_id}"
-    response = requests.put(url, data=json.dumps(payload), headers=headers)
+    response = scheduler.put(url, data=json.dumps(payload), headers=headers)
     if response.status_code in (200, 201):
         print(f"Qase defect {defect_id} updated with Jira link.")
+        return True
     else:
         print(f"Failed to update Qase defect {defect_id}. Response: {response.status_code} {response.text}")
+        return False
+
+def call_safely(fn, *args):
+    """Call a tracker function, reporting a request that failed for good as None."""
+    try:
+        return fn(*args)
+    except requests.RequestException as e:
+        print(f"Request failed in {fn.__name__}: {e}")
+        return None
+
+def process_failure(test_name, failure_message, checkpoint=None):
+    """Create the Qase defect, then the Jira issue, then link them.
+
+    Steps already recorded in checkpoint are skipped.
+    """
+    checkpoint = checkpoint or Checkpoint()
+    fp = fingerprint(test_name, failure_message)
+    progress = checkpoint.get(fp)
+
+    defect_id = progress.get("defect_id")
+    if not defect_id:
+        defect_id = call_safely(create_qase_defect, test_name, failure_message)
+        if not defect_id:
+            return None, None
+        checkpoint.update(fp, defect_id=defect_id)
+
+    jira_issue_key = progress.get("jira_key")
+    if not jira_issue_key:
+        jira_issue_key = call_safely(create_jira_issue, test_name, failure_message)
+        if not jira_issue_key:
+            return defect_id, None
+        checkpoint.update(fp, jira_key=jira_issue_key)
+
+    if not progress.get("linked"):
+        if call_safely(update_qase_defect_with_jira_link, defect_id, jira_issue_key):
+            checkpoint.update(fp, linked=True)
+    return defect_id, jira_issue_key
+
+def process_batch(failures, pool, checkpoint):
+    """Process a batch of failures using the Jira bulk API.
+
+    Qase has no bulk defect endpoint, so defects and links are still one
+    request each but run concurrently on pool. Each failure still goes
+    Qase defect -> Jira issue -> link, and steps already recorded in
+    checkpoint are skipped.
+    """
+    fps = [fingerprint(*failure) for failure in failures]
+    progress = [checkpoint.get(fp) for fp in fps]
+
+    def create_defect(i):
+        defect_id = progress[i].get("defect_id")
+        if not defect_id:
+            defect_id = call_safely(create_qase_defect, *failures[i])
+            if defect_id:
+                checkpoint.update(fps[i], defect_id=defect_id)
+        return defect_id
+
+    defect_ids = list(pool.map(create_defect, range(len(failures))))
+    jira_keys = [p.get("jira_key") for p in progress]
+    to_create = [i for i, defect_id in enumerate(defect_ids) if defect_id and not jira_keys[i]]
+    if to_create:
+        created = call_safely(create_jira_issues_bulk, [failures[i] for i in to_create]) or [None] * len(to_create)
+        for i, key in zip(to_create, created):
+            jira_keys[i] = key
+            if key:
+                checkpoint.update(fps[i], jira_key=key)
+
+    def link(i):
+        if call_safely(update_qase_defect_with_jira_link, defect_ids[i], jira_keys[i]):
+            checkpoint.update(fps[i], linked=True)
+
+    to_link = [i for i in range(len(failures)) if defect_ids[i] and jira_keys[i] and not progress[i].get("linked")]
+    list(pool.map(link, to_link))
+    return list(zip(defect_ids, jira_keys))
+
+def process_failures(failed_tests, concurrency=None, batch_size=None, checkpoint=None):
+    """Process failures in parallel, keeping the Qase -> Jira -> link order within each one.
+
+    With batch_size > 1 the Jira issues are created through the bulk API in
+    batches of that size. failed_tests may be a lazy iterable: it is read
+    one batch at a time, so the first requests go out while the rest of the
+    report is still being parsed. Returns a list of (defect_id,
+    jira_issue_key) in the order of failed_tests.
+    """
+    concurrency = concurrency or defect_concurrency
+    batch_size = batch_size or jira_bulk_size
+    checkpoint = checkpoint or Checkpoint()
+    results = []
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        if batch_size <= 1:
+            # Keep a few failures per worker queued rather than the whole report.
+            for chunk in chunks(failed_tests, concurrency * 4):
+                results += pool.map(lambda failure: process_failure(*failure, checkpoint), chunk)
+        else:
+            for batch in chunks(failed_tests, batch_size):
+                results += process_batch(batch, pool, checkpoint)
+    return results
+
+def find_resolved_jira_issues(jira_keys):
+    """Return the subset of jira_keys whose issues are in the Done status category."""
+    resolved = []
+    jira_keys = list(jira_keys)
+    url = f"{jira_base_url}/rest/api/3/search/jql"
+    for start in range(0, len(jira_keys), 100):
+        keys = jira_keys[start:start + 100]
+        params = {
+            "jql": f"key in ({','.join(keys)}) AND statusCategory = Done",
+            "fields": "key",
+            "maxResults": len(keys),
+        }
+        # The search/jql endpoint pages with a token rather than startAt
+        while True:
+            response = scheduler.get(url, params=params, headers=get_jira_headers())
+            if response.status_code != 200:
+                print(f"Failed to check Jira issue status. Response: {response.status_code} {response.text}")
+                break
+            result = response.json()
+            resolved += [issue["key"] for issue in result.get("issues", [])]
+            if result.get("isLast", True) or not result.get("nextPageToken"):
+                break
+            params["nextPageToken"] = result["nextPageToken"]
+    return resolved
+
+def process_new_failures(failed_tests, index, concurrency=None, batch_size=None, checkpoint=None):
+    """Process only the failures that index does not already know about.
+
+    Failures are matched by fingerprint, so a test failing the same way as
+    on a previous run (or twice in this run) makes no network calls. Newly
+    filed failures are recorded in the index once they have both a Qase
+    defect and a Jira issue. Returns the (defect_id, jira_issue_key)
+    results of the new failures.
+    """
+    new_failures = {}
+
+    def unfiled():
+        # Filter lazily so failed_tests can be streamed straight from the report.
+        for test_name, failure_message in failed_tests:
+            fp = fingerprint(test_name, failure_message)
+            if fp in new_failures:
+                continue
+            known = index.lookup(fp)
+            if known is not None:
+                count("defects.skipped")
+                print(f"Skipping {test_name}: already filed as Qase defect {known[0]} / Jira issue {known[1]}.")
+                continue
+            new_failures[fp] = test_name
+            yield test_name, failure_message
+
+    checkpoint = checkpoint or Checkpoint()
+    results = process_failures(unfiled(), concurrency, batch_size, checkpoint)
+    for fp, test_name in new_failures.items():
+        progress = checkpoint.get(fp)
+        if progress.get("linked"):
+            count("defects.filed")
+            index.record(fp, test_name, progress["defect_id"], progress["jira_key"])
+    return results
+
+def iter_failures(path):
+    """Yield (suite name, test name, "failure" or "error", message) for every failed test case.
+
+    The report is streamed with iterparse: each <testcase> is inspected as
+    soon as it has been parsed, and it and every other child of a suite
+    (system-out, properties, ...) is then removed from the tree, so memory
+    stays flat however large the report or a suite's captured output is. Suites may be nested at any
+    depth, with or without a <testsuites> wrapper.
+    """
+    stack = []
+    suites = []
+    for event, elem in ET.iterparse(path, events=("start", "end")):
+        if event == "start":
+            stack.append(elem)
+            if elem.tag == "testsuite":
+                suites.append(elem.get("name", ""))
+            continue
+
+        stack.pop()
+        if elem.tag == "testcase":
+            for kind in ("failure", "error"):
+                problem = elem.find(kind)
+                if problem is not None:
+                    message = problem.text or problem.get("message") or "No details provided."
+                    yield suites[-1] if suites else "", elem.get("name"), kind, message
+                    break
+        elif elem.tag == "testsuite":
+            suites.pop()
+        # Drop finished children of a suite; the children of a test case
+        # stay until the test case itself has been inspected.
+        if not stack:
+            elem.clear()
+        elif stack[-1].tag in ("testsuite", "testsuites"):
+            stack[-1].remove(elem)
+            elem.clear()
+
+def chunks(iterable, size):
+    """Yield lists of up to size items from iterable without reading ahead."""
+    it = iter(iterable)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+def main():
+    # Check required Qase configuration.
+    if not all([qase_api_base_url, qase_api_token, qase_project_code]):
+        print("Missing Qase configuration in environment variables. Skipping defect creation.")
+        return 1
+
+    # Failures are streamed from test-results.xml into the pipeline; only
+    # their fingerprints are kept, to check at the end that all were filed.
+    seen = set()
+
+    def failed_tests():
+        for suite_name, test_name, kind, failure_message in iter_failures("test-results.xml"):
+            seen.add(fingerprint(test_name, failure_message))
+            count(f"defects.{kind}s")
+            yield test_name, failure_message
+
+    # Skip failures that were already filed, process the rest concurrently.
+    index = DefectIndex(defect_index_path, defect_index_ttl_days)
+    try:
+        evicted = index.evict_expired()
+        if defect_index_check_resolved:
+            evicted += index.evict_jira_keys(find_resolved_jira_issues(index.jira_keys()))
+        if evicted:
+            print(f"Evicted {evicted} old or resolved failures from the defect index.")
+        checkpoint = Checkpoint(defect_checkpoint_path)
+        try:
+            with timer("defects.pipeline"):
+                process_new_failures(failed_tests(), index, checkpoint=checkpoint)
+        except (ET.ParseError, FileNotFoundError) as e:
+            print(f"Error parsing test results XML: {e}")
+            return 1
+
+        if not seen:
+            print("No test failures found. No defects to create.")
+            return 0
+
+        # Everything filed and linked is in the index now; keep the
+        # checkpoint only if there is work left for a rerun.
+        if all(index.lookup(fp) for fp in seen):
+            checkpoint.clear()
+        else:
+            print(f"Some failures were not fully processed, rerun to resume from {defect_checkpoint_path}.")
+    finally:
+        index.close()
+    return 0
 
-# Process each failed test.
-for test_name, failure_message in failed_tests:
-    defect_id = create_qase_defect(test_name, failure_message)
-    if defect_id:
-        jira_issue_key = create_jira_issue(test_name, failure_message)
-        if jira_issue_key:
-            update_qase_defect_with_jira_link(defect_id, jira_issue_key)
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,332 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+from defect_index import Checkpoint, DefectIndex, fingerprint
+
+try:
+    import create_defect
+    from request_scheduler import RequestScheduler, TokenBucket
+except ImportError:  # requests is only installed in the CI defect step
+    create_defect = None
+
+
+class StubTrackerHandler(BaseHTTPRequestHandler):
+    """Local stand-in for the Qase and Jira REST endpoints."""
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _handle(self, method):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        server = self.server
+        with server.lock:
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+        # Give other workers a chance to overlap with this request.
+        time.sleep(0.05)
+        with server.lock:
+            server.in_flight -= 1
+            server.calls.append((method, self.path, payload))
+            if server.throttle:
+                server.throttle -= 1
+                self.send_response(429)
+                self.send_header("Retry-After", "0")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            if method == "POST" and self.path == "/defect" and server.bad_gateway:
+                server.bad_gateway -= 1
+                self.send_response(502)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            if method == "POST" and self.path == "/rest/api/3/issue" and server.jira_down:
+                self.send_response(503)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            if method == "POST" and self.path == "/defect":
+                server.next_id += 1
+                body = {"result": {"id": server.next_id}}
+            elif method == "POST" and self.path == "/rest/api/3/issue":
+                server.next_id += 1
+                body = {"key": f"QTR-{server.next_id}"}
+            elif method == "POST" and self.path == "/rest/api/3/issue/bulk":
+                # Reject summaries containing "reject", create the rest.
+                body = {"issues": [], "errors": []}
+                for i, update in enumerate(payload["issueUpdates"]):
+                    if "reject" in update["fields"]["summary"]:
+                        body["errors"].append({"failedElementNumber": i, "status": 400})
+                    else:
+                        server.next_id += 1
+                        body["issues"].append({"key": f"QTR-{server.next_id}"})
+            else:
+                body = {"status": True}
+        self._reply(body)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        with self.server.lock:
+            self.server.calls.append(("GET", url.path, query))
+        if url.path != "/rest/api/3/search/jql":
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        # Return one resolved issue per page to exercise the page token.
+        resolved = [key for key in self.server.resolved if key in query["jql"][0]]
+        page = int(query.get("nextPageToken", ["0"])[0])
+        body = {"issues": [{"key": key} for key in resolved[page:page + 1]]}
+        if page + 1 < len(resolved):
+            body["nextPageToken"] = str(page + 1)
+        body["isLast"] = page + 1 >= len(resolved)
+        self._reply(body)
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PUT(self):
+        self._handle("PUT")
+
+
+@unittest.skipIf(create_defect is None, "requests is not installed")
+class TestCreateDefect(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubTrackerHandler)
+        self.server.lock = threading.Lock()
+        self.server.calls = []
+        self.server.in_flight = self.server.max_in_flight = self.server.next_id = 0
+        self.server.throttle = 0
+        self.server.jira_down = False
+        self.server.bad_gateway = 0
+        self.server.resolved = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+        base_url = f"http://127.0.0.1:{self.server.server_port}"
+        self.saved = {name: getattr(create_defect, name) for name in ("qase_api_base_url", "jira_base_url", "scheduler")}
+        create_defect.qase_api_base_url = base_url
+        create_defect.jira_base_url = base_url
+        create_defect.scheduler = RequestScheduler(rate=1000, max_retries=2, backoff=0)
+
+    def tearDown(self):
+        for name, value in self.saved.items():
+            setattr(create_defect, name, value)
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_failures_processed_concurrently_in_order(self):
+        failed_tests = [(f"test_{i}", f"boom {i}") for i in range(8)]
+        results = create_defect.process_failures(failed_tests, concurrency=4, batch_size=1)
+
+        self.assertEqual(len(results), 8)
+        self.assertTrue(all(defect_id and jira_key for defect_id, jira_key in results))
+        self.assertGreater(self.server.max_in_flight, 1)
+        self.assertLessEqual(self.server.max_in_flight, 4)
+
+        # Within each failure the defect comes first, then the issue, then the link.
+        for (defect_id, jira_key), (test_name, _) in zip(results, failed_tests):
+            steps = [i for i, (method, path, payload) in enumerate(self.server.calls)
+                     if payload.get("title") == f"Test Failure: {test_name}"
+                     or payload.get("fields", {}).get("summary") == f"Test Failure: {test_name}"
+                     or path == f"/defect/{defect_id}"]
+            self.assertEqual([self.server.calls[i][0:2] for i in steps], [
+                ("POST", "/defect"), ("POST", "/rest/api/3/issue"), ("PUT", f"/defect/{defect_id}")])
+            self.assertTrue(self.server.calls[steps[2]][2]["jira_link"].endswith(f"/browse/{jira_key}"))
+
+    def test_bulk_jira_creation_with_fallback(self):
+        """Jira issues are created in bulk; rejected items are retried one by one."""
+        failed_tests = [("test_a", "x"), ("test_reject", "y"), ("test_c", "z")]
+        results = create_defect.process_failures(failed_tests, concurrency=4, batch_size=3)
+
+        paths = [path for method, path, payload in self.server.calls]
+        self.assertEqual(paths.count("/rest/api/3/issue/bulk"), 1)
+        # Only the rejected item falls back to the single issue endpoint.
+        self.assertEqual(paths.count("/rest/api/3/issue"), 1)
+        self.assertEqual(paths.count("/defect"), 3)
+        self.assertTrue(all(defect_id and jira_key for defect_id, jira_key in results))
+        self.assertEqual(len({jira_key for _, jira_key in results}), 3)
+
+        # Each defect is linked to the issue created for its own test.
+        links = {path: payload["jira_link"] for method, path, payload in self.server.calls if method == "PUT"}
+        for defect_id, jira_key in results:
+            self.assertTrue(links[f"/defect/{defect_id}"].endswith(f"/browse/{jira_key}"))
+
+    def test_known_failures_are_skipped(self):
+        """A failure already in the index makes no network calls."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            index = DefectIndex(os.path.join(tmpdir, "index.db"))
+            failed_tests = [("test_a", "boom at 0x7f00"), ("test_b", "bang"), ("test_a", "boom at 0x7f00")]
+            first = create_defect.process_new_failures(failed_tests, index, batch_size=1)
+            self.assertEqual(len(first), 2)
+            calls = len(self.server.calls)
+            self.assertEqual(calls, 6)
+
+            # Same failures again, with a different object address.
+            second = create_defect.process_new_failures([("test_a", "boom at 0x7e11"), ("test_b", "bang")], index)
+            self.assertEqual(second, [])
+            self.assertEqual(len(self.server.calls), calls)
+            index.close()
+
+    def test_throttled_requests_are_retried(self):
+        self.server.throttle = 2
+        results = create_defect.process_failures([("test_a", "x")], batch_size=1)
+        self.assertTrue(all(results[0]))
+        self.assertEqual([path for _, path, _ in self.server.calls].count("/defect"), 3)
+
+    def test_create_not_retried_after_bad_gateway(self):
+        """A 502 may come after the defect was created, so the POST is not sent again."""
+        self.server.bad_gateway = 1
+        results = create_defect.process_failures([("test_a", "x")], batch_size=1)
+        self.assertEqual(results, [(None, None)])
+        self.assertEqual([path for _, path, _ in self.server.calls], ["/defect"])
+
+    def test_failed_fallback_keeps_bulk_keys(self):
+        """A fallback issue that cannot be created does not lose the issues created in bulk."""
+        checkpoint = Checkpoint()
+        failed_tests = [("test_a", "x"), ("test_reject", "y"), ("test_c", "z")]
+        def create_jira_issue(test_name, failure_message):
+            raise create_defect.requests.ConnectionError("Jira is down")
+
+        with mock.patch.object(create_defect, "create_jira_issue", create_jira_issue):
+            results = create_defect.process_failures(failed_tests, batch_size=3, checkpoint=checkpoint)
+        self.assertIsNone(results[1][1])
+        self.assertTrue(results[0][1] and results[2][1])
+        self.assertTrue(checkpoint.is_done(fingerprint("test_a", "x")))
+        self.assertEqual(checkpoint.get(fingerprint("test_c", "z"))["jira_key"], results[2][1])
+
+    def test_find_resolved_jira_issues(self):
+        self.server.resolved = ["QTR-1", "QTR-3"]
+        self.assertEqual(create_defect.find_resolved_jira_issues(["QTR-1", "QTR-2", "QTR-3"]), ["QTR-1", "QTR-3"])
+        self.assertEqual({path for _, path, _ in self.server.calls}, {"/rest/api/3/search/jql"})
+
+    def test_rerun_resumes_from_checkpoint(self):
+        """A rerun skips the steps the checkpoint says already succeeded."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "checkpoint.jsonl")
+            self.server.jira_down = True
+            first = create_defect.process_failures([("test_a", "x")], batch_size=1, checkpoint=Checkpoint(path))
+            self.assertIsNone(first[0][1])
+
+            self.server.jira_down = False
+            calls = len(self.server.calls)
+            second = create_defect.process_failures([("test_a", "x")], batch_size=1, checkpoint=Checkpoint(path))
+            self.assertEqual(second[0][0], first[0][0])
+            self.assertEqual([path for _, path, _ in self.server.calls[calls:]],
+                             ["/rest/api/3/issue", f"/defect/{first[0][0]}"])
+            self.assertTrue(Checkpoint(path).is_done(fingerprint("test_a", "x")))
+
+
+    def test_failures_are_consumed_lazily(self):
+        """Requests for the first batch go out before the rest is read."""
+        calls_seen = []
+
+        def failed_tests():
+            for i in range(4):
+                calls_seen.append(len(self.server.calls))
+                yield f"test_{i}", "boom"
+
+        create_defect.process_failures(failed_tests(), concurrency=2, batch_size=2)
+        self.assertEqual(calls_seen[:2], [0, 0])
+        self.assertGreater(calls_seen[2], 0)
+
+
+@unittest.skipIf(create_defect is None, "requests is not installed")
+class TestIterFailures(unittest.TestCase):
+    def test_nested_suites_and_errors(self):
+        report = """<?xml version='1.0' encoding='utf-8'?>
+<testsuites>
+  <testsuite name="outer">
+    <testcase name="test_ok"/>
+    <testcase name="test_fail"><failure message="short">assert 1 == 2</failure></testcase>
+    <testsuite name="inner">
+      <testcase name="test_error"><error message="KeyError: 'x'"/></testcase>
+      <system-out>captured</system-out>
+    </testsuite>
+    <properties><property name="python" value="3.10"/></properties>
+    <testcase name="test_after"><failure/></testcase>
+  </testsuite>
+</testsuites>
+"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "results.xml")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(report)
+            self.assertEqual(list(create_defect.iter_failures(path)), [
+                ("outer", "test_fail", "failure", "assert 1 == 2"),
+                ("inner", "test_error", "error", "KeyError: 'x'"),
+                ("outer", "test_after", "failure", "No details provided."),
+            ])
+
+
+@unittest.skipIf(create_defect is None, "requests is not installed")
+class TestTokenBucket(unittest.TestCase):
+    def test_rate_and_block(self):
+        now = [0.0]
+        def sleep(seconds):
+            now[0] += seconds
+        bucket = TokenBucket(rate=2, capacity=2, clock=lambda: now[0], sleep=sleep)
+        for _ in range(6):
+            bucket.acquire()
+        # Two tokens up front, then one every half second.
+        self.assertAlmostEqual(now[0], 2.0)
+        bucket.block(10)
+        bucket.acquire()
+        self.assertAlmostEqual(now[0], 12.5)
+
+    def test_fractional_rate(self):
+        now = [0.0]
+        def sleep(seconds):
+            now[0] += seconds
+        bucket = TokenBucket(rate=0.5, clock=lambda: now[0], sleep=sleep)
+        for _ in range(3):
+            bucket.acquire()
+        # One request up front, then one every two seconds.
+        self.assertAlmostEqual(now[0], 4.0)
+
+
+class TestDefectIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.index = DefectIndex(os.path.join(self.tmpdir.name, "index.db"), ttl_days=1)
+
+    def tearDown(self):
+        self.index.close()
+        self.tmpdir.cleanup()
+
+    def test_fingerprint_ignores_run_specific_noise(self):
+        first = 'File "/home/runner/work/a/GUI_unit_test.py", line 120\n  AssertionError:  at 0x7f3a'
+        second = 'File "/tmp/b/GUI_unit_test.py", line 121\n AssertionError: at 0x7f99'
+        self.assertEqual(fingerprint("test_x", first), fingerprint("test_x", second))
+        self.assertNotEqual(fingerprint("test_x", first), fingerprint("test_y", first))
+        self.assertNotEqual(fingerprint("test_x", "ValueError"), fingerprint("test_x", "KeyError"))
+
+    def test_ttl_and_resolved_eviction(self):
+        self.index.record("old", "test_old", 1, "QTR-1", now=1000.0)
+        self.index.record("new", "test_new", 2, "QTR-2", now=1000.0 + 80000)
+        self.index.record("done", "test_done", 3, "QTR-3", now=1000.0 + 80000)
+        self.assertEqual(self.index.lookup("new", now=1000.0 + 86000), ("2", "QTR-2"))
+
+        self.assertEqual(self.index.evict_expired(now=1000.0 + 90000), 1)
+        self.assertIsNone(self.index.lookup("old"))
+        self.assertEqual(self.index.evict_jira_keys(["QTR-3"]), 1)
+        self.assertEqual(self.index.jira_keys(), ["QTR-2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
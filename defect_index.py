@@ -0,0 +1,129 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+# Parts of a failure message that change between runs of the same failure
+_NOISE = [
+    (re.compile(r"0x[0-9a-fA-F]+"), "0x?"),                    # object addresses
+    (re.compile(r'File "[^"]*[\\/]([^"\\/]+)"'), r'File "\1"'),  # checkout paths
+    (re.compile(r"line \d+"), "line ?"),                       # line numbers
+    (re.compile(r"\s+"), " "),
+]
+
+
+def normalize_message(failure_message):
+    message = failure_message or ""
+    for pattern, replacement in _NOISE:
+        message = pattern.sub(replacement, message)
+    return message.strip()
+
+
+def fingerprint(test_name, failure_message):
+    """Return a stable hash of a test name and its normalized failure message."""
+    text = f"{test_name}\n{normalize_message(failure_message)}"
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class DefectIndex:
+    """On-disk index of failures that already have a Qase defect and Jira issue.
+
+    Entries are keyed by fingerprint() and remember when the failure was
+    last seen. Failures that have not been seen for ttl_days are assumed
+    fixed and evicted, so if they come back they are filed again.
+    """
+
+    def __init__(self, path, ttl_days=30):
+        self.ttl = ttl_days * 86400
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS defects ("
+            "fingerprint TEXT PRIMARY KEY, test_name TEXT, defect_id TEXT, jira_key TEXT, "
+            "first_seen REAL, last_seen REAL)"
+        )
+        self.conn.commit()
+
+    def lookup(self, fp, now=None):
+        """Return (defect_id, jira_key) for a known failure, else None.
+
+        A hit refreshes the entry's last seen time.
+        """
+        row = self.conn.execute("SELECT defect_id, jira_key FROM defects WHERE fingerprint = ?", (fp,)).fetchone()
+        if row is not None:
+            with self.conn:
+                self.conn.execute("UPDATE defects SET last_seen = ? WHERE fingerprint = ?", (now or time.time(), fp))
+        return row
+
+    def record(self, fp, test_name, defect_id, jira_key, now=None):
+        now = now or time.time()
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO defects (fingerprint, test_name, defect_id, jira_key, first_seen, last_seen) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (fp, test_name, str(defect_id), jira_key, now, now),
+            )
+
+    def evict_expired(self, now=None):
+        """Remove failures not seen within the TTL and return how many were removed."""
+        cutoff = (now or time.time()) - self.ttl
+        with self.conn:
+            return self.conn.execute("DELETE FROM defects WHERE last_seen < ?", (cutoff,)).rowcount
+
+    def evict_jira_keys(self, jira_keys):
+        """Remove the entries filed under the given, e.g. resolved, Jira issues."""
+        with self.conn:
+            return self.conn.executemany("DELETE FROM defects WHERE jira_key = ?", [(k,) for k in jira_keys]).rowcount
+
+    def jira_keys(self):
+        return [row[0] for row in self.conn.execute("SELECT jira_key FROM defects")]
+
+    def close(self):
+        self.conn.close()
+
+
+class Checkpoint:
+    """Resumable record of how far each failure got in the current run.
+
+    Progress is appended to a JSON-lines file as each step succeeds
+    (defect_id, jira_key, linked), so a rerun after a crash or throttling
+    only repeats the steps that are left. With no path it is kept in
+    memory only.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.state = {}
+        self.lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A line cut short by a crash
+                        continue
+                    self.state.setdefault(entry.pop("fingerprint"), {}).update(entry)
+
+    def get(self, fp):
+        with self.lock:
+            return dict(self.state.get(fp, {}))
+
+    def update(self, fp, **progress):
+        with self.lock:
+            self.state.setdefault(fp, {}).update(progress)
+            if self.path:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(dict(progress, fingerprint=fp)) + "\n")
+
+    def is_done(self, fp):
+        return self.get(fp).get("linked", False)
+
+    def clear(self):
+        """Forget all progress, e.g. once every failure has been processed."""
+        with self.lock:
+            self.state.clear()
+            if self.path and os.path.exists(self.path):
+                os.remove(self.path)
@@ -0,0 +1,162 @@
+"""Lightweight timing and counting for the blotter and the CI helpers.
+
+Hot paths are wrapped with the ``timed`` decorator or the ``timer`` context
+manager, which record each call's latency in a histogram, and ``count``
+adds to a named counter (rows, requests, retries, ...). Recording is cheap
+enough to leave on; nothing is written unless asked for:
+
+    METRICS_OUTPUT=metrics.json     write a JSON summary (count, p50, p99, ...
+                                    per timer, plus all counters) at exit
+    METRICS_PROFILE=profile.pstats  run the process under cProfile and dump
+                                    the stats at exit
+
+Both paths may contain ``{pid}``, for runs with several processes.
+"""
+import atexit
+import cProfile
+import json
+import math
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+# Histogram buckets grow by this factor, so percentiles are within ~10%
+BUCKET_GROWTH = 1.1
+# Smallest latency that gets its own bucket, in seconds
+BUCKET_MIN_S = 1e-6
+
+
+class Histogram:
+    """Latency histogram with geometric buckets and constant memory."""
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def add(self, seconds):
+        index = 0 if seconds <= BUCKET_MIN_S else int(math.log(seconds / BUCKET_MIN_S, BUCKET_GROWTH)) + 1
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def percentile(self, p):
+        """Return the upper bound of the bucket holding the p-th percentile (0-100)."""
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(self.count * p / 100))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                return min(self.max, max(self.min, BUCKET_MIN_S * BUCKET_GROWTH ** index))
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "total_s": self.total,
+            "mean_s": self.total / self.count if self.count else None,
+            "min_s": self.min if self.count else None,
+            "p50_s": self.percentile(50),
+            "p90_s": self.percentile(90),
+            "p99_s": self.percentile(99),
+            "max_s": self.max if self.count else None,
+        }
+
+
+class Metrics:
+    """Thread-safe registry of named latency histograms and counters."""
+
+    def __init__(self):
+        self.timers = {}
+        self.counters = {}
+        self.lock = threading.Lock()
+
+    def observe(self, name, seconds):
+        with self.lock:
+            histogram = self.timers.get(name)
+            if histogram is None:
+                histogram = self.timers[name] = Histogram()
+            histogram.add(seconds)
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    @contextmanager
+    def timer(self, name):
+        """Time the body of a with block, also when it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def timed(self, name=None):
+        """Decorator timing every call of a function, by default under its qualified name."""
+        def decorate(fn):
+            label = name or f"{fn.__module__}.{fn.__qualname__}"
+
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.observe(label, time.perf_counter() - start)
+            return wrapper
+        return decorate
+
+    def summary(self):
+        with self.lock:
+            return {
+                "timers": {name: h.summary() for name, h in sorted(self.timers.items())},
+                "counters": dict(sorted(self.counters.items())),
+            }
+
+    def write(self, path):
+        report = {"argv": sys.argv, "pid": os.getpid(), "time": time.time()}
+        report.update(self.summary())
+        with open(path.format(pid=os.getpid()), "w") as f:
+            json.dump(report, f, indent=2)
+
+    def reset(self):
+        with self.lock:
+            self.timers.clear()
+            self.counters.clear()
+
+
+# Process-wide registry used by the module level helpers below
+metrics = Metrics()
+timer = metrics.timer
+timed = metrics.timed
+count = metrics.count
+
+
+def _write_at_exit(path):
+    try:
+        metrics.write(path)
+    except OSError as e:
+        print(f"Could not write metrics to {path}: {e}")
+
+
+def _dump_profile(profiler, path):
+    profiler.disable()
+    profiler.dump_stats(path.format(pid=os.getpid()))
+
+
+if os.environ.get("METRICS_OUTPUT"):
+    atexit.register(_write_at_exit, os.environ["METRICS_OUTPUT"])
+
+if os.environ.get("METRICS_PROFILE"):
+    _profiler = cProfile.Profile()
+    _profiler.enable()
+    atexit.register(_dump_profile, _profiler, os.environ["METRICS_PROFILE"])
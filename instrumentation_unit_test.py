@@ -0,0 +1,67 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from instrumentation import Histogram, Metrics
+
+
+class TestHistogram(unittest.TestCase):
+    def test_percentiles_are_close(self):
+        histogram = Histogram()
+        for ms in range(1, 1001):
+            histogram.add(ms / 1000)
+        self.assertEqual(histogram.count, 1000)
+        self.assertAlmostEqual(histogram.percentile(50), 0.5, delta=0.05)
+        self.assertAlmostEqual(histogram.percentile(99), 0.99, delta=0.1)
+        self.assertEqual(histogram.percentile(100), 1.0)
+        self.assertEqual(histogram.min, 0.001)
+
+    def test_empty(self):
+        summary = Histogram().summary()
+        self.assertEqual(summary["count"], 0)
+        self.assertIsNone(summary["p50_s"])
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.metrics = Metrics()
+
+    def test_timers_and_counters(self):
+        @self.metrics.timed("work")
+        def work(fail=False):
+            if fail:
+                raise ValueError("boom")
+            return 42
+
+        self.assertEqual(work(), 42)
+        with self.assertRaises(ValueError):
+            work(fail=True)
+        with self.metrics.timer("block"):
+            pass
+        self.metrics.count("rows", 10)
+        self.metrics.count("rows")
+
+        summary = self.metrics.summary()
+        self.assertEqual(summary["timers"]["work"]["count"], 2)
+        self.assertEqual(summary["timers"]["block"]["count"], 1)
+        self.assertEqual(summary["counters"], {"rows": 11})
+
+    def test_summary_written_at_exit(self):
+        """METRICS_OUTPUT makes a process write its metrics as JSON when it exits."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "metrics-{pid}.json")
+            code = "import instrumentation\ninstrumentation.count('rows', 3)\nwith instrumentation.timer('step'): pass\n"
+            subprocess.run([sys.executable, "-c", code], check=True, env=dict(os.environ, METRICS_OUTPUT=path),
+                           cwd=os.path.dirname(os.path.abspath(__file__)))
+            files = os.listdir(tmpdir)
+            self.assertEqual(len(files), 1)
+            with open(os.path.join(tmpdir, files[0])) as f:
+                report = json.load(f)
+        self.assertEqual(report["counters"], {"rows": 3})
+        self.assertEqual(report["timers"]["step"]["count"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
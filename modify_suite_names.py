@@ -1,26 +1,107 @@
+import argparse
 import glob
+import os
+import shutil
+import tempfile
 import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from xml.sax.saxutils import quoteattr
 
-# Create a new root element
-root = ET.Element("testsuites")
-
-# Iterate over all XML files in the test results directory
-for file in glob.glob("test-results-dir/*.xml"):
-    tree = ET.parse(file)
-    file_root = tree.getroot()
-    # Some files may have <testsuite> as the root while others <testsuites>
-    if file_root.tag == "testsuite":
-        # Optionally modify the suite name
-        old_name = file_root.get("name", "")
-        file_root.set("name", f"Modified - {old_name}")
-        root.append(file_root)
-    elif file_root.tag == "testsuites":
-        for testsuite in file_root.findall("testsuite"):
-            old_name = testsuite.get("name", "")
-            testsuite.set("name", f"Modified - {old_name}")
-            root.append(testsuite)
-
-# Write out the merged and modified XML file
-tree_out = ET.ElementTree(root)
-tree_out.write("test-results.xml", encoding="utf-8", xml_declaration=True)
-print("Merged and modified XML file created.")
+from instrumentation import count, timed, timer
+
+
+def start_tag(elem, name):
+    """Serialize the start tag of a <testsuite> with its name replaced."""
+    attrib = dict(elem.attrib)
+    attrib["name"] = name
+    attrs = "".join(f" {key}={quoteattr(value)}" for key, value in attrib.items())
+    return f"<{elem.tag}{attrs}>"
+
+
+@timed("junit.write_suites")
+def write_suites(path, out):
+    """Stream every <testsuite> of one JUnit file to out with a modified name.
+
+    Files may have <testsuite> as the root or a <testsuites> wrapper. Each
+    child of a suite (testcase, properties, system-out, ...) is written as
+    soon as it has been parsed and then dropped, so memory use is bounded
+    by the largest single test case rather than the size of the report.
+    Returns the number of suites and test cases written.
+    """
+    depth = 0
+    suites = testcases = 0
+    root = suite = None
+    for event, elem in ET.iterparse(path, events=("start", "end")):
+        if event == "start":
+            depth += 1
+            if root is None:
+                root = elem
+            if suite is None and elem.tag == "testsuite" and depth <= 2:
+                # Optionally modify the suite name
+                old_name = elem.get("name", "")
+                out.write(start_tag(elem, f"Modified - {old_name}"))
+                suite, suite_depth = elem, depth
+            continue
+
+        if elem is suite:
+            out.write(f"</{elem.tag}>\n")
+            suites += 1
+            suite = None
+            # Drop the finished suite from the <testsuites> wrapper
+            root.clear()
+        elif suite is not None and depth == suite_depth + 1:
+            out.write(ET.tostring(elem, encoding="unicode"))
+            testcases += elem.tag == "testcase"
+            suite.remove(elem)
+        depth -= 1
+    return suites, testcases
+
+
+def write_fragment(path):
+    """Stream one file's suites into a temporary fragment.
+
+    Returns the fragment path and the suite and test case counts.
+    """
+    fd, fragment = tempfile.mkstemp(suffix=".xml")
+    with os.fdopen(fd, "w", encoding="utf-8") as out:
+        return (fragment,) + write_suites(path, out)
+
+
+def count_written(suites, testcases):
+    count("junit.files")
+    count("junit.suites", suites)
+    count("junit.testcases", testcases)
+
+
+def merge(files, output, jobs=1):
+    """Merge the suites of all files into a single <testsuites> document.
+
+    With jobs > 1 the input files are parsed in parallel worker processes,
+    each writing its suites to a temporary fragment that is then appended
+    to the output in input order.
+    """
+    with timer("junit.merge"), open(output, "w", encoding="utf-8") as out:
+        out.write("<?xml version='1.0' encoding='utf-8'?>\n<testsuites>\n")
+        if jobs > 1 and len(files) > 1:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                for fragment, suites, testcases in pool.map(write_fragment, files):
+                    count_written(suites, testcases)
+                    with open(fragment, encoding="utf-8") as f:
+                        shutil.copyfileobj(f, out)
+                    os.remove(fragment)
+        else:
+            for file in files:
+                count_written(*write_suites(file, out))
+        out.write("</testsuites>\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Merge JUnit XML files and modify their suite names.")
+    parser.add_argument("--input", default="test-results-dir/*.xml", help="glob of JUnit files to merge")
+    parser.add_argument("--output", default="test-results.xml")
+    parser.add_argument("--jobs", type=int, default=1, help="number of files to parse in parallel")
+    args = parser.parse_args()
+
+    # Iterate over all XML files in the test results directory
+    merge(sorted(glob.glob(args.input)), args.output, args.jobs)
+    print("Merged and modified XML file created.")
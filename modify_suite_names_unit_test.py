@@ -0,0 +1,75 @@
+import os
+import tempfile
+import unittest
+import xml.etree.ElementTree as ET
+from modify_suite_names import merge
+
+SUITE_ROOT = """<?xml version="1.0" encoding="UTF-8"?>
+<testsuite name="GUI_unit_test.TestSimpleGUI" tests="2" failures="1">
+  <properties><property name="python" value="3.10"/></properties>
+  <testcase classname="GUI_unit_test.TestSimpleGUI" name="test_save_details_buy" time="0.1"/>
+  <testcase classname="GUI_unit_test.TestSimpleGUI" name="test_incorrect_subtotal_fail" time="0.2">
+    <failure type="AssertionError" message="'200.00' != &quot;150.00&quot;">a &lt; b &amp; c</failure>
+  </testcase>
+  <system-out><![CDATA[<stdout> & "quotes"]]></system-out>
+</testsuite>
+"""
+
+WRAPPED = """<?xml version="1.0" encoding="UTF-8"?>
+<testsuites>
+  <testsuite name="R&amp;D &lt;suite&gt;" tests="1">
+    <testcase classname="blotter_unit_test.TestBlotter" name="test_add_trade_buy"/>
+  </testsuite>
+  <testsuite name="second" tests="1">
+    <testcase classname="blotter_unit_test.TestBlotter" name="test_clear"><error message="boom"/></testcase>
+  </testsuite>
+</testsuites>
+"""
+
+
+class TestMerge(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.files = [self.write("a.xml", SUITE_ROOT), self.write("b.xml", WRAPPED)]
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return path
+
+    def merged(self, jobs=1):
+        output = os.path.join(self.tmpdir.name, f"merged-{jobs}.xml")
+        merge(self.files, output, jobs)
+        return output
+
+    def test_suite_root_and_wrapper(self):
+        root = ET.parse(self.merged()).getroot()
+        self.assertEqual(root.tag, "testsuites")
+        self.assertEqual([suite.get("name") for suite in root], [
+            "Modified - GUI_unit_test.TestSimpleGUI", "Modified - R&D <suite>", "Modified - second"])
+        self.assertEqual([len(suite.findall("testcase")) for suite in root], [2, 1, 1])
+        self.assertEqual(root[0].get("failures"), "1")
+        self.assertEqual(root[0].find("properties/property").get("value"), "3.10")
+        self.assertEqual(root[2].find("testcase/error").get("message"), "boom")
+
+    def test_escaping_and_cdata(self):
+        root = ET.parse(self.merged()).getroot()
+        failure = root[0].find("testcase/failure")
+        self.assertEqual(failure.get("message"), "'200.00' != \"150.00\"")
+        self.assertEqual(failure.text, "a < b & c")
+        self.assertEqual(root[0].find("system-out").text, '<stdout> & "quotes"')
+
+    def test_parallel_output_matches_serial(self):
+        with open(self.merged(jobs=1), encoding="utf-8") as f:
+            serial = f.read()
+        with open(self.merged(jobs=2), encoding="utf-8") as f:
+            parallel = f.read()
+        self.assertEqual(parallel, serial)
+
+
+if __name__ == "__main__":
+    unittest.main()
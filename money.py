@@ -0,0 +1,45 @@
+from decimal import ROUND_HALF_EVEN, Decimal, InvalidOperation
+
+# Trade values are held as integer minor units (cents), so sums are exact
+MINOR_UNITS = 100
+
+# Minor units are stored in int64 columns. The range is kept symmetric so
+# the Buy/Sell sign rule can never push a value out of it
+MAX_UNITS = 2 ** 63 - 1
+MIN_UNITS = -MAX_UNITS
+
+
+def to_minor(value):
+    """Convert a number or numeric string to integer minor units.
+
+    Values with more decimal places than the minor unit are rounded half to
+    even. Raises ValueError for anything that is not a finite number or
+    does not fit in an int64 column.
+    """
+    if isinstance(value, int):
+        units = value * MINOR_UNITS
+    else:
+        try:
+            amount = Decimal(str(value).strip())
+        except InvalidOperation:
+            raise ValueError(f"Not a number: {value!r}") from None
+        if not amount.is_finite():
+            raise ValueError(f"Not a finite number: {value!r}")
+        # Reject huge exponents before scaling, which would overflow the
+        # decimal context or build an enormous int
+        if amount.adjusted() > 18:
+            raise ValueError(f"Value out of range: {value!r}")
+        units = int(amount.scaleb(2).to_integral_value(rounding=ROUND_HALF_EVEN))
+    if not MIN_UNITS <= units <= MAX_UNITS:
+        raise ValueError(f"Value out of range: {value!r}")
+    return units
+
+
+def from_minor(units):
+    """Return integer minor units as an exact Decimal, e.g. 10050 -> 100.50."""
+    return Decimal(units).scaleb(-2)
+
+
+def format_minor(units):
+    """Format integer minor units for display with two decimal places."""
+    return f"{from_minor(units):.2f}"
@@ -0,0 +1,88 @@
+GROSS_BUY = "Gross Buy"
+GROSS_SELL = "Gross Sell"
+
+
+class PositionEngine:
+    """Keeps the running positions for the Trade Blotter.
+
+    The engine owns the numeric trade values so the GUI never has to read
+    them back out of the Treeview. Besides the overall total it maintains
+    the net position per group (e.g. a (commodity, trade type) pair) and
+    the gross buy and gross sell. Every operation is O(1) and returns the
+    keys whose aggregate changed, so the display only has to touch those.
+
+    The blotter passes values as integer minor units, which keeps every
+    aggregate exact no matter how many trades are added.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.count = 0
+        self.gross_buy = 0
+        self.gross_sell = 0
+        self.net = {}
+
+    def _apply(self, value, group, sign):
+        self.total += sign * value
+        if value < 0:
+            self.gross_sell += sign * value
+            changed = (GROSS_SELL,)
+        else:
+            self.gross_buy += sign * value
+            changed = (GROSS_BUY,)
+        if group is not None:
+            self.net[group] = self.net.get(group, 0) + sign * value
+            changed = (group,) + changed
+        return changed
+
+    def add(self, value, group=None):
+        """Add a new trade value to the running positions."""
+        self.count += 1
+        return self._apply(value, group, 1)
+
+    def remove(self, value, group=None):
+        """Remove a previously added trade value from the running positions."""
+        self.count -= 1
+        return self._apply(value, group, -1)
+
+    def replace(self, old_value, new_value, group=None):
+        """Swap an existing trade value for an edited one."""
+        changed = self._apply(old_value, group, -1) + self._apply(new_value, group, 1)
+        return tuple(dict.fromkeys(changed))
+
+    def position(self, key):
+        """Return the aggregate for a group key, GROSS_BUY or GROSS_SELL."""
+        if key == GROSS_BUY:
+            return self.gross_buy
+        if key == GROSS_SELL:
+            return self.gross_sell
+        return self.net.get(key, 0)
+
+    def snapshot(self):
+        """Return the aggregates as a JSON-serializable dict."""
+        return {
+            "total": self.total,
+            "count": self.count,
+            "gross_buy": self.gross_buy,
+            "gross_sell": self.gross_sell,
+            "net": [list(group) + [value] if isinstance(group, tuple) else [group, value]
+                    for group, value in self.net.items()],
+        }
+
+    def restore(self, snapshot):
+        """Replace the aggregates with ones previously taken by snapshot()."""
+        self.total = snapshot["total"]
+        self.count = snapshot["count"]
+        self.gross_buy = snapshot["gross_buy"]
+        self.gross_sell = snapshot["gross_sell"]
+        self.net = {}
+        for entry in snapshot["net"]:
+            group = entry[0] if len(entry) == 2 else tuple(entry[:-1])
+            self.net[group] = entry[-1]
+
+    def clear(self):
+        self.total = 0
+        self.count = 0
+        self.gross_buy = 0
+        self.gross_sell = 0
+        self.net.clear()
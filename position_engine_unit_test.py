@@ -0,0 +1,39 @@
+import unittest
+from position_engine import GROSS_BUY, GROSS_SELL, PositionEngine
+
+class TestPositionEngine(unittest.TestCase):
+    def setUp(self):
+        self.engine = PositionEngine()
+
+    def test_add_updates_running_total(self):
+        self.engine.add(100.0)
+        self.engine.add(-20.0)
+        self.assertEqual(self.engine.total, 80.0)
+        self.assertEqual(self.engine.count, 2)
+
+    def test_remove_and_replace(self):
+        """Deleting or editing a trade adjusts the total without a rescan."""
+        self.engine.add(120.0)
+        self.engine.add(-30.0)
+        self.engine.remove(-30.0)
+        self.assertEqual(self.engine.total, 120.0)
+        self.engine.replace(120.0, 80.0)
+        self.assertEqual(self.engine.total, 80.0)
+        self.assertEqual(self.engine.count, 1)
+
+    def test_grouped_positions(self):
+        """Net positions are kept per group alongside gross buy and sell."""
+        changed = self.engine.add(100.0, ("Power", "Physical"))
+        self.assertEqual(changed, (("Power", "Physical"), GROSS_BUY))
+        changed = self.engine.add(-30.0, ("Power", "Physical"))
+        self.assertEqual(changed, (("Power", "Physical"), GROSS_SELL))
+        self.engine.add(50.0, ("ULSD", "Financial"))
+        self.assertEqual(self.engine.position(("Power", "Physical")), 70.0)
+        self.assertEqual(self.engine.position(("ULSD", "Financial")), 50.0)
+        self.assertEqual(self.engine.position(("Natural Gas", "Physical")), 0.0)
+        self.assertEqual(self.engine.position(GROSS_BUY), 150.0)
+        self.assertEqual(self.engine.position(GROSS_SELL), -30.0)
+        self.assertEqual(self.engine.total, 120.0)
+
+if __name__ == "__main__":
+    unittest.main()
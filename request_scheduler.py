@@ -0,0 +1,169 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from urllib3.exceptions import NewConnectionError
+
+from instrumentation import count, timer
+
+# Responses worth retrying for requests that are safe to repeat
+RETRY_STATUSES = (429, 502, 503, 504)
+# For creating POSTs only the statuses that mean the server did not act on
+# the request: a 502 or 504 may come back after it was processed
+POST_RETRY_STATUSES = (429, 503)
+
+
+class TokenBucket:
+    """Thread-safe token bucket allowing rate requests per second, bursting to capacity."""
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        # Always room for one whole token, or a rate below 1/s would never send
+        self.capacity = max(1, capacity or rate)
+        self.tokens = self.capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request may be sent."""
+        while True:
+            with self.lock:
+                now = self.clock()
+                if now > self.updated:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                wait = self.blocked_until - now
+                if wait <= 0:
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait = (1 - self.tokens) / self.rate
+            self.sleep(wait)
+
+    def block(self, seconds):
+        """Hold every caller back for seconds, e.g. after the server throttled us.
+
+        The bucket starts refilling from empty once the block ends.
+        """
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, self.clock() + seconds)
+            self.tokens = 0
+            self.updated = self.blocked_until
+
+
+def connect_failed(error):
+    """True if a ConnectionError happened before the request was sent."""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+def retry_after(response):
+    """Return the delay requested by a Retry-After header in seconds, or None."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RequestScheduler:
+    """Sends the outbound tracker calls with rate limiting and retries.
+
+    Every host gets its own token bucket, so Qase and Jira are throttled
+    independently. Throttled (429) and unavailable (502/503/504) responses
+    and connection errors are retried with exponential backoff and jitter,
+    honouring Retry-After when the server sends it. POSTs create defects
+    and issues, so they are only retried when the server cannot have acted
+    on them: 429, 503 or a failure to connect. A 429 also pauses the
+    host's bucket so the other worker threads back off too. Each worker
+    thread reuses its own keep-alive session.
+    """
+
+    def __init__(self, rate=10.0, burst=None, max_retries=5, backoff=1.0, max_backoff=60.0, sleep=time.sleep):
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.sleep = sleep
+        self.buckets = {}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    @property
+    def session(self):
+        """This thread's requests session, created on first use."""
+        session = getattr(self.local, "session", None)
+        if session is None:
+            session = self.local.session = requests.Session()
+        return session
+
+    def bucket(self, url):
+        host = urlsplit(url).netloc
+        with self.lock:
+            if host not in self.buckets:
+                self.buckets[host] = TokenBucket(self.rate, self.burst, sleep=self.sleep)
+            return self.buckets[host]
+
+    def request(self, method, url, **kwargs):
+        """Send a request and return the final response.
+
+        Raises the last connection error if every attempt failed to connect.
+        """
+        bucket = self.bucket(url)
+        is_post = method.upper() == "POST"
+        retry_statuses = POST_RETRY_STATUSES if is_post else RETRY_STATUSES
+        label = f"http.{method} {urlsplit(url).netloc}"
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                count("http.retries")
+            bucket.acquire()
+            count("http.requests")
+            try:
+                with timer(label):
+                    response = self.session.request(method, url, **kwargs)
+            except requests.ConnectionError as e:
+                count("http.connection_errors")
+                if attempt == self.max_retries or (is_post and not connect_failed(e)):
+                    raise
+                self.sleep(self._delay(attempt))
+                continue
+            if response.status_code not in retry_statuses or attempt == self.max_retries:
+                return response
+
+            delay = retry_after(response)
+            if delay is None:
+                delay = self._delay(attempt)
+            delay = min(delay, self.max_backoff)
+            print(f"{method} {url} returned {response.status_code}, retrying in {delay:.1f}s.")
+            if response.status_code == 429:
+                count("http.throttled")
+                bucket.block(delay)
+            else:
+                self.sleep(delay)
+
+    def _delay(self, attempt):
+        return min(self.max_backoff, self.backoff * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request("PUT", url, **kwargs)
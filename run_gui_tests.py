@@ -0,0 +1,115 @@
+"""Run the GUI unit tests in parallel shards, each under its own Xvfb display.
+
+The test cases of the given modules are dealt round-robin to --shards
+worker processes. Each worker runs under xvfb-run on its own display
+number, chosen up front from --display-base upwards (xvfb-run -a probes
+for a free display without locking, so shards started together can pick
+the same one), and writes its results to one JUnit file in --output,
+ready to be merged by modify_suite_names.py:
+
+    python run_gui_tests.py --shards 4 --output test-results-dir
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import unittest
+
+
+def test_ids(suite):
+    """Return the ids of every test case in a (nested) test suite."""
+    ids = []
+    for test in suite:
+        if isinstance(test, unittest.TestSuite):
+            ids += test_ids(test)
+        else:
+            ids.append(test.id())
+    return ids
+
+
+def split(ids, shards):
+    """Deal test ids round-robin into at most shards non-empty lists."""
+    return [ids[i::shards] for i in range(min(shards, len(ids)))]
+
+
+def run_shard(ids, output):
+    """Run the given tests in this process and write their JUnit report to output."""
+    import xmlrunner
+
+    suite = unittest.defaultTestLoader.loadTestsFromNames(ids)
+    with open(output, "wb") as f:
+        result = xmlrunner.XMLTestRunner(output=f, verbosity=1).run(suite)
+    return 0 if result.wasSuccessful() else 1
+
+
+def free_displays(count, base):
+    """Return count X display numbers from base upwards that have no lock file."""
+    displays = []
+    number = base
+    while len(displays) < count:
+        if not os.path.exists(f"/tmp/.X{number}-lock"):
+            displays.append(number)
+        number += 1
+    return displays
+
+
+def run_shards(modules, shards, output, xvfb=True, display_base=100):
+    """Start one worker process per shard and wait for all of them.
+
+    Returns the number of shards that had failing tests and the number
+    that wrote no JUnit report (e.g. because Xvfb did not start).
+    """
+    ids = sorted(test_ids(unittest.defaultTestLoader.loadTestsFromNames(modules)))
+    os.makedirs(output, exist_ok=True)
+    groups = split(ids, shards)
+    displays = free_displays(len(groups), display_base) if xvfb else []
+
+    workers = []
+    for i, shard in enumerate(groups):
+        path = os.path.join(output, f"TEST-shard-{i}.xml")
+        if os.path.exists(path):
+            # A report left by an earlier run must not stand in for this one
+            os.remove(path)
+        prefix = ["xvfb-run", f"--server-num={displays[i]}"] if xvfb else []
+        command = prefix + [sys.executable, os.path.abspath(__file__), "--run-shard", path] + shard
+        workers.append((path, subprocess.Popen(command)))
+    print(f"Running {len(ids)} tests in {len(workers)} shards.")
+
+    failed = missing = 0
+    for path, worker in workers:
+        code = worker.wait()
+        if not os.path.exists(path):
+            print(f"Shard exited with code {code} without writing {path}.")
+            missing += 1
+        elif code != 0:
+            failed += 1
+    return failed, missing
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run GUI unit tests in parallel Xvfb shards.")
+    parser.add_argument("modules", nargs="*", default=["GUI_unit_test"], help="test modules to run")
+    parser.add_argument("--shards", type=int, default=os.cpu_count() or 1, help="number of worker processes")
+    parser.add_argument("--output", default="test-results-dir", help="directory for the per-shard JUnit files")
+    parser.add_argument("--display-base", type=int, default=100, help="first X display number to give a shard")
+    parser.add_argument("--no-xvfb", action="store_true", help="use the current display instead of xvfb-run")
+    parser.add_argument("--run-shard", metavar="OUTPUT", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_shard:
+        # Worker process: the positional arguments are the test ids of this shard.
+        sys.exit(run_shard(args.modules, args.run_shard))
+
+    xvfb = not args.no_xvfb
+    if xvfb and shutil.which("xvfb-run") is None:
+        print("xvfb-run not found, running the shards on the current display.")
+        xvfb = False
+    failed, missing = run_shards(args.modules, args.shards, args.output, xvfb, args.display_base)
+    if failed:
+        print(f"{failed} shards had failing tests.")
+    # Exit with 2 if tests are missing from the report, 1 if some failed
+    if missing:
+        print(f"{missing} shards wrote no report, their tests are missing from the results.")
+        sys.exit(2)
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,91 @@
+import tkinter as tk
+from tkinter import ttk
+
+
+class TradeGrid(tk.Frame):
+    """Virtual-scrolling Treeview for the trades in the blotter.
+
+    Only the rows in the visible window (plus a small buffer) exist as Tk
+    items. They are reused and filled in from ``source`` as the user scrolls,
+    so memory and redraw cost depend on the viewport rather than the book
+    size. ``source`` only needs ``len()`` and ``rows(start, stop)``, which
+    TradeStore provides.
+    """
+
+    def __init__(self, master, source, columns, buffer=2, **kwargs):
+        super().__init__(master, **kwargs)
+        self.source = source
+        self.buffer = buffer
+        self.first = 0
+
+        self.tree = ttk.Treeview(self, columns=columns, show="headings")
+        for column in columns:
+            self.tree.heading(column, text=column)
+        self.visible = int(self.tree.cget("height"))
+
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self.yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        # The Treeview never holds more rows than it can show, so all
+        # scrolling goes through yview and pages rows in from the source
+        self.tree.bind("<Configure>", self._on_configure)
+        self.tree.bind("<MouseWheel>", self._on_mousewheel)
+        self.tree.bind("<Button-4>", lambda event: self._scroll(-3))
+        self.tree.bind("<Button-5>", lambda event: self._scroll(3))
+        self.tree.bind("<Prior>", lambda event: self._scroll(-self.visible))
+        self.tree.bind("<Next>", lambda event: self._scroll(self.visible))
+
+    def yview(self, *args):
+        """Scrollbar command: handles both "moveto" and "scroll" requests."""
+        if args[0] == "moveto":
+            self.first = int(float(args[1]) * len(self.source))
+        elif args[0] == "scroll":
+            step = self.visible if args[2] == "pages" else 1
+            self.first += int(args[1]) * step
+        self.refresh()
+
+    def row_added(self):
+        """Tell the grid the source has grown by one row at the end."""
+        if len(self.source) - 1 < self.first + self.visible + self.buffer:
+            self.refresh()
+        else:
+            self._update_scrollbar()
+
+    def refresh(self):
+        """Fill the materialized rows from the source at the current offset."""
+        total = len(self.source)
+        self.first = max(0, min(self.first, total - self.visible))
+        rows = self.source.rows(self.first, self.first + self.visible + self.buffer)
+
+        items = self.tree.get_children()
+        for item, values in zip(items, rows):
+            self.tree.item(item, values=values)
+        for values in rows[len(items):]:
+            self.tree.insert("", "end", values=values)
+        if len(items) > len(rows):
+            self.tree.delete(*items[len(rows):])
+        self._update_scrollbar()
+
+    def _update_scrollbar(self):
+        total = len(self.source)
+        if total <= self.visible:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self.first / total, (self.first + self.visible) / total)
+
+    def _scroll(self, rows):
+        self.first += rows
+        self.refresh()
+        return "break"
+
+    def _on_mousewheel(self, event):
+        return self._scroll(-3 if event.delta > 0 else 3)
+
+    def _on_configure(self, event):
+        rowheight = ttk.Style(self).lookup("Treeview", "rowheight") or 20
+        # Leave room for the heading row
+        visible = max(1, event.height // int(rowheight) - 1)
+        if visible != self.visible:
+            self.visible = visible
+            self.refresh()
@@ -0,0 +1,46 @@
+import csv
+import os
+
+from trade_store import COLUMNS
+
+
+def read_trades(path):
+    """Lazily yield (commodity, trade type, buy_sell, value) rows from a file.
+
+    CSV and Parquet files are supported. Both need a column for each of the
+    blotter headings: Commodity, Trade Type, Buy_Sell and Value. Values are
+    passed through as read, SimpleGUI.load_trades validates them.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return _read_csv(path)
+    if extension in (".parquet", ".pq"):
+        return _read_parquet(path)
+    raise ValueError(f"Unsupported trade file type: {path}")
+
+
+def _read_csv(path):
+    # utf-8-sig also accepts the byte order mark Excel puts in CSV exports
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header = [name.strip() for name in next(reader, [])]
+        try:
+            positions = [header.index(column) for column in COLUMNS]
+        except ValueError:
+            raise ValueError(f"{path} must have the columns {', '.join(COLUMNS)}") from None
+        width = max(positions) + 1
+        for row in reader:
+            # Skip blank and short rows, like any other invalid trade
+            if len(row) >= width:
+                yield tuple(row[i] for i in positions)
+
+
+def _read_parquet(path, batch_size=65536):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Reading Parquet trade files requires pyarrow") from None
+    parquet_file = pq.ParquetFile(path)
+    for batch in parquet_file.iter_batches(batch_size=batch_size, columns=list(COLUMNS)):
+        columns = batch.to_pydict()
+        yield from zip(*(columns[column] for column in COLUMNS))
@@ -0,0 +1,44 @@
+import os
+import tempfile
+import unittest
+from trade_import import read_trades
+
+class TestReadTrades(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def write(self, name, text):
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            f.write(text)
+        return path
+
+    def test_read_csv_in_blotter_column_order(self):
+        path = self.write("book.csv", "Value,Buy_Sell,Commodity,Trade Type\n100,Buy,Power,Physical\n\n30,Sell,ULSD,Financial\n")
+        self.assertEqual(list(read_trades(path)), [
+            ("Power", "Physical", "Buy", "100"),
+            ("ULSD", "Financial", "Sell", "30"),
+        ])
+
+    def test_short_rows_skipped(self):
+        path = self.write("book.csv", "Commodity,Trade Type,Buy_Sell,Value\nPower,Physical\nULSD,Financial,Sell,30\n")
+        self.assertEqual(list(read_trades(path)), [("ULSD", "Financial", "Sell", "30")])
+
+    def test_excel_byte_order_mark(self):
+        path = self.write("book.csv", "\ufeffCommodity,Trade Type,Buy_Sell,Value\nPower,Physical,Buy,100\n")
+        self.assertEqual(list(read_trades(path)), [("Power", "Physical", "Buy", "100")])
+
+    def test_missing_column(self):
+        path = self.write("book.csv", "Commodity,Value\nPower,100\n")
+        with self.assertRaises(ValueError):
+            list(read_trades(path))
+
+    def test_unsupported_extension(self):
+        with self.assertRaises(ValueError):
+            read_trades("book.xlsx")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import json
+import sqlite3
+from array import array
+
+from trade_store import COMMODITIES, TRADE_TYPES, TradeStore
+
+
+class TradeJournal:
+    """Append-only SQLite journal of the trades saved in the blotter.
+
+    The database runs in WAL mode and appends are group committed: trades
+    are buffered and written in one transaction once ``commit_every`` are
+    pending or flush() is called. Each commit appends one batch row holding
+    the raw bytes of the trade store columns, so loading a large book is a
+    handful of reads rather than one Python object per trade.
+
+    snapshot() stores the aggregated positions together with the id of the
+    last journaled batch, so load() only has to replay the batches written
+    after the latest snapshot.
+    """
+
+    def __init__(self, path, commit_every=100):
+        self.path = path
+        self.commit_every = commit_every
+        self.pending = TradeStore()
+        # The blotter hands journal writes to its background worker thread
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS batches ("
+            "id INTEGER PRIMARY KEY, commodity BLOB, trade_type BLOB, side BLOB, value BLOB)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS snapshot ("
+            "id INTEGER PRIMARY KEY CHECK (id = 1), last_batch_id INTEGER, positions TEXT)"
+        )
+        self.conn.commit()
+
+    def append(self, trade):
+        """Journal a valid (commodity, trade type, buy_sell, value) trade."""
+        self.pending.append(*trade)
+        if len(self.pending) >= self.commit_every:
+            self.flush()
+
+    def extend(self, trades):
+        self.pending.extend(trades)
+        if len(self.pending) >= self.commit_every:
+            self.flush()
+
+    def flush(self):
+        """Commit all pending trades as one batch in a single transaction."""
+        if not len(self.pending):
+            return
+        columns = (self.pending.commodity, self.pending.trade_type, self.pending.side, self.pending.value)
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO batches (commodity, trade_type, side, value) VALUES (?, ?, ?, ?)",
+                [col.tobytes() for col in columns],
+            )
+        self.pending.clear()
+
+    def snapshot(self, positions):
+        """Store the aggregated positions of everything journaled so far.
+
+        positions is a PositionEngine.snapshot() taken after the last trade
+        passed to append() or extend().
+        """
+        self.flush()
+        last_id = self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM batches").fetchone()[0]
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO snapshot (id, last_batch_id, positions) VALUES (1, ?, ?)",
+                (last_id, json.dumps(positions)),
+            )
+
+    def load(self, store, positions):
+        """Rebuild the trade store and positions from the journal.
+
+        The positions start from the latest snapshot and only the batches
+        journaled after it are replayed. Returns the number of trades loaded.
+        """
+        row = self.conn.execute("SELECT last_batch_id, positions FROM snapshot WHERE id = 1").fetchone()
+        last_id = 0
+        if row is not None:
+            last_id = row[0]
+            positions.restore(json.loads(row[1]))
+
+        start = len(store)
+        cursor = self.conn.execute("SELECT id, commodity, trade_type, side, value FROM batches ORDER BY id")
+        for batch_id, commodity, trade_type, side, value in cursor:
+            if batch_id <= last_id:
+                store.extend_columns(commodity, trade_type, side, value)
+                continue
+            # Replay the journal tail into the positions
+            columns = (array('b', commodity), array('b', trade_type), array('b', side), array('q'))
+            columns[3].frombytes(value)
+            store.extend_columns(*columns)
+            for c, tt, v in zip(columns[0], columns[1], columns[3]):
+                positions.add(v, (COMMODITIES[c], TRADE_TYPES[tt]))
+        return len(store) - start
+
+    def clear(self):
+        """Drop every journaled trade and the snapshot, e.g. when the blotter is reset."""
+        self.pending.clear()
+        with self.conn:
+            self.conn.execute("DELETE FROM batches")
+            self.conn.execute("DELETE FROM snapshot")
+
+    def close(self):
+        self.flush()
+        self.conn.close()
@@ -0,0 +1,66 @@
+import os
+import tempfile
+import unittest
+from position_engine import PositionEngine
+from trade_journal import TradeJournal
+from trade_store import TradeStore
+
+class TestTradeJournal(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "trades.db")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def reload(self):
+        store, positions = TradeStore(), PositionEngine()
+        journal = TradeJournal(self.path)
+        loaded = journal.load(store, positions)
+        journal.close()
+        return loaded, store, positions
+
+    def test_group_commit(self):
+        """Trades are only written once commit_every are pending or on flush."""
+        journal = TradeJournal(self.path, commit_every=2)
+        journal.append(("Power", "Physical", "Buy", 10000))
+        self.assertEqual(self.reload()[0], 0)
+        journal.append(("ULSD", "Financial", "Sell", -3000))
+        self.assertEqual(self.reload()[0], 2)
+        journal.append(("ULSD", "Financial", "Buy", 500))
+        journal.close()
+        self.assertEqual(self.reload()[0], 3)
+
+    def test_clear(self):
+        journal = TradeJournal(self.path)
+        journal.append(("Power", "Physical", "Buy", 10000))
+        journal.snapshot(PositionEngine().snapshot())
+        journal.append(("ULSD", "Financial", "Sell", -3000))
+        journal.clear()
+        journal.append(("ULSD", "Financial", "Buy", 500))
+        journal.close()
+
+        loaded, store, positions = self.reload()
+        self.assertEqual(loaded, 1)
+        self.assertEqual(positions.total, 500)
+
+    def test_snapshot_and_tail_replay(self):
+        journal = TradeJournal(self.path)
+        positions = PositionEngine()
+        for trade in (("Power", "Physical", "Buy", 10000), ("ULSD", "Financial", "Sell", -3000)):
+            journal.append(trade)
+            positions.add(trade[3], trade[:2])
+        journal.snapshot(positions.snapshot())
+        journal.extend([("Power", "Physical", "Sell", -4000)])
+        journal.close()
+
+        loaded, store, restored = self.reload()
+        self.assertEqual(loaded, 3)
+        self.assertEqual(store.row(2), ("Power", "Physical", "Sell", -40))
+        self.assertEqual(restored.total, 3000)
+        self.assertEqual(restored.count, 3)
+        self.assertEqual(restored.position(("Power", "Physical")), 6000)
+        self.assertEqual(restored.position(("ULSD", "Financial")), -3000)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,189 @@
+from array import array
+
+from money import MAX_UNITS, from_minor, to_minor
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, the store falls back to plain arrays
+    np = None
+
+# Each text column is stored as a small integer code into one of these tables
+COMMODITIES = ('Power', 'Natural Gas', 'ULSD')
+TRADE_TYPES = ('Physical', 'Financial')
+SIDES = ('Buy', 'Sell')
+
+# Column headings used by the trade grid and by trade files
+COLUMNS = ("Commodity", "Trade Type", "Buy_Sell", "Value")
+
+_COMMODITY_CODES = {name: code for code, name in enumerate(COMMODITIES)}
+_TRADE_TYPE_CODES = {name: code for code, name in enumerate(TRADE_TYPES)}
+_SIDE_CODES = {name: code for code, name in enumerate(SIDES)}
+
+
+def signed_value(buy_sell, value):
+    """Apply the blotter sign rule: Sells are negative, Buys are positive."""
+    if buy_sell.lower() == "sell":
+        return -abs(value)
+    return abs(value)
+
+
+def normalize_trade(commodity, trade_type, buy_sell, value):
+    """Validate a trade and apply the sign rule.
+
+    Returns (commodity, trade type, buy_sell, signed value) with the value
+    in integer minor units, or None if a field is missing, unknown, or the
+    value is not a number.
+    """
+    commodity = str(commodity).strip()
+    trade_type = str(trade_type).strip()
+    buy_sell = str(buy_sell).strip()
+    if commodity not in _COMMODITY_CODES or trade_type not in _TRADE_TYPE_CODES or buy_sell not in _SIDE_CODES:
+        return None
+    try:
+        numeric_value = to_minor(value)
+    except ValueError:
+        return None
+    return (commodity, trade_type, buy_sell, signed_value(buy_sell, numeric_value))
+
+
+def _exact_sum(values):
+    """Sum an int64 NumPy array without the silent wraparound of int64 sums."""
+    if len(values) and len(values) * max(-int(values.min()), int(values.max())) > MAX_UNITS:
+        # The int64 sum could overflow, add as Python ints instead
+        return sum(values.tolist())
+    return int(values.sum())
+
+
+class TradeStore:
+    """Columnar, array-backed store for the trades entered in the blotter.
+
+    Commodity, trade type and side are kept as one-byte codes and the value
+    as int64 minor units (see money.py), so a million trades take roughly
+    11 MB and sums are exact.
+    """
+
+    def __init__(self):
+        self.commodity = array('b')
+        self.trade_type = array('b')
+        self.side = array('b')
+        self.value = array('q')
+
+    def __len__(self):
+        return len(self.value)
+
+    @property
+    def nbytes(self):
+        return sum(col.itemsize * len(col) for col in (self.commodity, self.trade_type, self.side, self.value))
+
+    def append(self, commodity, trade_type, buy_sell, value):
+        """Store a trade with its value in minor units and return its row index.
+
+        Raises ValueError if any of the text fields is not a known code and
+        TypeError or OverflowError if value is not an int64. Nothing is
+        stored unless the whole trade is valid, so the columns stay aligned.
+        """
+        codes = (COMMODITIES.index(commodity), TRADE_TYPES.index(trade_type), SIDES.index(buy_sell))
+        units = array('q', [value])
+        self.commodity.append(codes[0])
+        self.trade_type.append(codes[1])
+        self.side.append(codes[2])
+        self.value.extend(units)
+        return len(self.value) - 1
+
+    def extend(self, trades):
+        """Store a batch of (commodity, trade type, buy_sell, value) trades.
+
+        The trades must already be valid, e.g. from normalize_trade. All
+        columns are built before any is extended, so a bad trade raises
+        without storing part of the batch.
+        """
+        trades = list(trades)
+        columns = (
+            array('b', (_COMMODITY_CODES[t[0]] for t in trades)),
+            array('b', (_TRADE_TYPE_CODES[t[1]] for t in trades)),
+            array('b', (_SIDE_CODES[t[2]] for t in trades)),
+            array('q', (t[3] for t in trades)),
+        )
+        self.extend_columns(*columns)
+
+    def extend_columns(self, commodity, trade_type, side, value):
+        """Append whole columns of codes and values, e.g. read from a journal.
+
+        Each argument is an array of the matching type or its raw bytes.
+        """
+        for col, data in ((self.commodity, commodity), (self.trade_type, trade_type),
+                          (self.side, side), (self.value, value)):
+            if isinstance(data, array):
+                col.extend(data)
+            else:
+                col.frombytes(data)
+
+    def row(self, index):
+        """Return a trade as (commodity, trade type, buy_sell, value) with an exact Decimal value."""
+        return (
+            COMMODITIES[self.commodity[index]],
+            TRADE_TYPES[self.trade_type[index]],
+            SIDES[self.side[index]],
+            from_minor(self.value[index]),
+        )
+
+    def raw_row(self, index):
+        """Return a trade as stored, with its value in integer minor units.
+
+        This is the form append() and the journal take.
+        """
+        return (
+            COMMODITIES[self.commodity[index]],
+            TRADE_TYPES[self.trade_type[index]],
+            SIDES[self.side[index]],
+            self.value[index],
+        )
+
+    def rows(self, start=0, stop=None):
+        if stop is None or stop > len(self):
+            stop = len(self)
+        return [self.row(i) for i in range(start, stop)]
+
+    def clear(self):
+        for col in (self.commodity, self.trade_type, self.side, self.value):
+            del col[:]
+
+    def mask(self, commodity=None, trade_type=None, buy_sell=None):
+        """Return a boolean selector for the trades matching every given field.
+
+        This is a NumPy array when NumPy is installed and a list otherwise.
+        """
+        filters = []
+        if commodity is not None:
+            filters.append((self.commodity, COMMODITIES.index(commodity)))
+        if trade_type is not None:
+            filters.append((self.trade_type, TRADE_TYPES.index(trade_type)))
+        if buy_sell is not None:
+            filters.append((self.side, SIDES.index(buy_sell)))
+
+        if np is not None:
+            selected = np.ones(len(self), dtype=bool)
+            for col, code in filters:
+                selected &= np.frombuffer(col, dtype=np.int8) == code
+            return selected
+
+        selected = [True] * len(self)
+        for col, code in filters:
+            selected = [s and c == code for s, c in zip(selected, col)]
+        return selected
+
+    def total_minor(self, commodity=None, trade_type=None, buy_sell=None):
+        """Sum the values, in minor units, of the trades matching every given field."""
+        if commodity is None and trade_type is None and buy_sell is None:
+            if np is not None:
+                return _exact_sum(np.frombuffer(self.value, dtype=np.int64))
+            return sum(self.value)
+
+        selected = self.mask(commodity, trade_type, buy_sell)
+        if np is not None:
+            return _exact_sum(np.frombuffer(self.value, dtype=np.int64)[selected])
+        return sum(v for v, s in zip(self.value, selected) if s)
+
+    def total(self, commodity=None, trade_type=None, buy_sell=None):
+        """Sum the values of the trades matching every given field as an exact Decimal."""
+        return from_minor(self.total_minor(commodity, trade_type, buy_sell))
@@ -0,0 +1,69 @@
+import unittest
+from decimal import Decimal
+from money import to_minor
+from trade_store import TradeStore, normalize_trade, signed_value
+
+class TestTradeStore(unittest.TestCase):
+    def setUp(self):
+        # Values are stored in minor units (cents).
+        self.store = TradeStore()
+        self.store.append("Power", "Physical", "Buy", 10000)
+        self.store.append("ULSD", "Financial", "Sell", signed_value("Sell", 3000))
+        self.store.append("Power", "Financial", "Buy", 8000)
+
+    def test_rows_round_trip(self):
+        self.assertEqual(len(self.store), 3)
+        self.assertEqual(self.store.row(1), ("ULSD", "Financial", "Sell", -30.0))
+        self.assertEqual(self.store.rows(2), [("Power", "Financial", "Buy", 80.0)])
+
+    def test_totals_and_filters(self):
+        self.assertEqual(self.store.total(), 150.0)
+        self.assertEqual(self.store.total(commodity="Power"), 180.0)
+        self.assertEqual(self.store.total(commodity="Power", trade_type="Physical"), 100.0)
+        self.assertEqual(self.store.total(buy_sell="Sell"), -30.0)
+        self.assertEqual(list(self.store.mask(trade_type="Financial")), [False, True, True])
+
+    def test_unknown_code_rejected(self):
+        """Only the codes offered in the GUI dropdowns can be stored."""
+        with self.assertRaises(ValueError):
+            self.store.append("Crude", "Physical", "Buy", 100)
+        self.assertEqual(len(self.store), 3)
+
+    def test_totals_are_exact(self):
+        """Summing many values that are inexact in binary floating point gives no drift."""
+        store = TradeStore()
+        for _ in range(100000):
+            store.append("Power", "Physical", "Buy", to_minor("0.10"))
+        self.assertEqual(store.total(), Decimal("10000.00"))
+        self.assertEqual(store.total_minor(), 1000000)
+
+    def test_normalize_trade(self):
+        self.assertEqual(normalize_trade(" Power", "Physical", "Sell ", "12.345"), ("Power", "Physical", "Sell", -1234))
+        self.assertIsNone(normalize_trade("Power", "Physical", "Buy", "nan"))
+        self.assertIsNone(normalize_trade("Power", "Physical", "Buy", ""))
+        self.assertIsNone(normalize_trade("Power", "Physical", "Buy", "1e5000000"))
+        self.assertIsNone(normalize_trade("Power", "Physical", "Buy", "1e17"))
+
+    def test_invalid_value_leaves_columns_aligned(self):
+        with self.assertRaises(TypeError):
+            self.store.append("Power", "Physical", "Buy", self.store.row(0)[3])
+        self.assertEqual(len(self.store), 3)
+        self.assertEqual(self.store.nbytes, 3 * (1 + 1 + 1 + 8))
+        self.assertEqual(self.store.raw_row(0)[3], self.store.value[0])
+
+    def test_extend_rejects_batch_atomically(self):
+        with self.assertRaises(OverflowError):
+            self.store.extend([("Power", "Physical", "Buy", 100), ("ULSD", "Physical", "Buy", 2 ** 63)])
+        self.assertEqual(self.store.nbytes, 3 * (1 + 1 + 1 + 8))
+
+    def test_total_beyond_int64_is_exact(self):
+        store = TradeStore()
+        store.extend([("Power", "Physical", "Buy", 2 ** 63 - 1), ("Power", "Physical", "Buy", 100)])
+        self.assertEqual(store.total_minor(), 2 ** 63 + 99)
+        self.assertEqual(str(store.total(commodity="Power")), "92233720368547759.07")
+
+    def test_columns_are_fixed_width(self):
+        self.assertEqual(self.store.nbytes, 3 * (1 + 1 + 1 + 8))
+
+if __name__ == "__main__":
+    unittest.main()